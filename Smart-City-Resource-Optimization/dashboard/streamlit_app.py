@@ -17,23 +17,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 import json
 
-from integration.risk_table import load_all_data, generate_area_risk_table, get_city_health_score
-from waste.routing import calculate_bin_priority, get_high_priority_bins
-from water.anomaly_demand import analyze_peak_usage, train_leak_detection_model, train_demand_prediction_model
-from disease.trend_alerts import aggregate_disease_data, generate_disease_alerts
+from integration.pipeline import refresh_city_data
+from waste.route_repair import RoutePlan
+from waste.spatial import AREA_CENTROIDS
 from integration.notifier import send_emergency_sms, send_emergency_email
 
-# Area mapping coordinates (Mock)
-AREA_COORDS = {
-    "Shivajinagar": [18.5314, 73.8446],
-    "Kothrud": [18.5074, 73.8077],
-    "Hingne Khurd": [18.4831, 73.8219],
-    "Wakad": [18.5987, 73.7688],
-    "Baner": [18.5590, 73.7868],
-    "Viman Nagar": [18.5679, 73.9143],
-    "Kalyani Nagar": [18.5471, 73.9033],
-    "Koregaon Park": [18.5362, 73.8939]
-}
+# Area mapping coordinates (Mock), shared with the routing code
+AREA_COORDS = AREA_CENTROIDS
 
 st.set_page_config(page_title="Smart City Resource Optimization", layout="wide", page_icon="🌍")
 
@@ -100,13 +90,8 @@ with st.sidebar:
 # -----------------
 @st.cache_data
 def get_dashboard_data():
-    waste_df, water_df, disease_df = load_all_data(base_path=project_root)
-    risk_table = generate_area_risk_table(waste_df, water_df, disease_df, base_path=project_root)
-    health_score = get_city_health_score(risk_table)
-    
-    # Waste Data
-    waste_prio = calculate_bin_priority(waste_df)
-    high_prio_bins = get_high_priority_bins(waste_prio)
+    # Domain pipelines run concurrently; SMARTCITY_PIPELINE_BACKEND / SMARTCITY_PIPELINE_WORKERS pick the pool
+    data = refresh_city_data(base_path=project_root, backend=os.environ.get("SMARTCITY_PIPELINE_BACKEND", "thread"))
     
     # Try to load route if it exists
     route_data = None
@@ -114,25 +99,14 @@ def get_dashboard_data():
     if os.path.exists(route_path):
         with open(route_path, "r") as f:
             route_data = json.load(f)
-            
-    # Water Data
-    peaks = analyze_peak_usage(water_df)
-    latest_water = water_df[water_df['timestamp'] >= water_df['timestamp'].max() - pd.Timedelta(days=1)].copy()
-    latest_water_scored, _ = train_leak_detection_model(latest_water, base_path=project_root)
-    water_anomalies = latest_water_scored[latest_water_scored['leak_risk_level'] == "High Risk"]
-    water_demand, _ = train_demand_prediction_model(water_df, base_path=project_root)
-    
-    # Disease Data
-    disease_alerts = generate_disease_alerts(disease_df)
-    weekly_disease = aggregate_disease_data(disease_df)
-    
-    return {
-        "risk_table": risk_table,
-        "health_score": health_score,
-        "waste": {"prio": waste_prio, "high_prio": high_prio_bins, "route": route_data},
-        "water": {"peaks": peaks, "anomalies": water_anomalies, "demand": water_demand},
-        "disease": {"alerts": disease_alerts, "weekly": weekly_disease}
-    }
+    data["waste"]["route"] = route_data
+    fleet_path = os.path.join(project_root, "outputs/optimized_routes/waste_fleet_routes.json")
+    fleet_data = None
+    if os.path.exists(fleet_path):
+        with open(fleet_path, "r") as f:
+            fleet_data = json.load(f)
+    data["waste"]["fleet"] = fleet_data
+    return data
 
 try:
     data = get_dashboard_data()
@@ -181,16 +155,29 @@ with st.sidebar:
 
 # Inject Citizen Data
 if st.session_state.get('citizen_report_baner', False):
-    mock_bin = pd.DataFrame([{
-        'bin_id': 'BIN-CITIZEN-999',
-        'area': 'Baner',
-        'fill_percentage': 100.0,
-        'overflow_risk': 1,
-        'population_density': 8000,
-        'timestamp': pd.Timestamp.now(),
-        'priority': 99.9
-    }])
-    data["waste"]["high_prio"] = pd.concat([mock_bin, data["waste"]["high_prio"]], ignore_index=True)
+    # The report re-ranks the bin in the live priority index (O(log n)) instead of recomputing every bin
+    bin_index = data["waste"]["index"]
+    bin_index.report_overflow('BIN-CITIZEN-999', area='Baner', population_density=8000, timestamp=pd.Timestamp.now())
+    data["waste"]["high_prio"] = bin_index.high_priority_frame()
+
+    # Slot the bin into the trucks already on the road instead of re-planning the shift
+    fleet = data["waste"]["fleet"] or data["waste"]["route"]
+    if fleet:
+        with st.sidebar:
+            try:
+                plan = RoutePlan.from_fleet(fleet, data["waste"]["prio"])
+                diff = plan.insert_urgent(bin_index.frame(['BIN-CITIZEN-999']))
+            except ValueError as e:
+                st.warning(f"Routes are out of date with the bin data, re-run routing: {e}")
+            else:
+                for placed in diff["inserted"]:
+                    st.info(f"🚛 Truck {placed['truck'] + 1} picks up {placed['bin_id']} (+{placed['added_km']:.2f} km)")
+                if diff["unassigned"]:
+                    st.warning("No truck has spare capacity for the reported bin.")
+                if data["waste"]["fleet"]:
+                    data["waste"]["fleet"] = plan.to_fleet()
+                else:
+                    data["waste"]["route"] = plan.to_fleet()[0]
     data["risk_table"].loc[data["risk_table"]['area'] == 'Baner', 'final_risk_score'] = 95.0
     data["risk_table"].loc[data["risk_table"]['area'] == 'Baner', 'cross_domain_alert'] = "🚨 CITIZEN REPORT: Overflowing Waste Emergency"
 
@@ -379,7 +366,10 @@ for i, tab_name in enumerate(tabs_list):
                 
             with col2:
                 st.write("📊 **Peak Usage Analysis**")
-                fig = px.bar(data['water']['peaks'], x='hour', y='flow_rate_lpm', title="Average Flow Rate by Hour")
+                cube = data['water']['usage_cube']
+                peak_area = st.selectbox("Area", ["All areas"] + sorted(cube.areas), key="peak_usage_area")
+                peaks = data['water']['peaks'] if peak_area == "All areas" else cube.hourly(area=peak_area)
+                fig = px.bar(peaks, x='hour', y='flow_rate_lpm', title=f"Average Flow Rate by Hour ({peak_area})")
                 st.plotly_chart(fig, use_container_width=True)
                 
             st.write("📈 **Short-term Demand Forecast (System Level)**")
@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 from datetime import datetime, timedelta
 
+# Run as a script from anywhere: the project root holds the shared area tables
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from waste.spatial import AREA_CENTROIDS, DEPOT_COORDS
+
+
 def generate_waste_data(num_rows=15000, output_path="data/raw/pune_waste_management_dataset_15000_rows.csv"):
     np.random.seed(42)
     areas = ["Shivajinagar", "Kothrud", "Hingne Khurd", "Wakad", "Baner", "Viman Nagar", "Kalyani Nagar", "Koregaon Park"]
@@ -15,6 +21,12 @@ def generate_waste_data(num_rows=15000, output_path="data/raw/pune_waste_managem
         "population_density": np.random.uniform(5000, 20000, num_rows), # people per sq km in that area
         "timestamp": [(datetime.now() - timedelta(minutes=np.random.randint(0, 1440))).strftime("%Y-%m-%d %H:%M:%S") for _ in range(num_rows)]
     }
+    # Bin positions: scattered up to ~1 km around the area centroid
+    centroids = np.array([AREA_CENTROIDS[a] for a in data["area"]])
+    radius = np.sqrt(np.random.uniform(0, 1, num_rows)) / 111.0
+    angle = np.random.uniform(0, 2 * np.pi, num_rows)
+    data["latitude"] = centroids[:, 0] + radius * np.sin(angle)
+    data["longitude"] = centroids[:, 1] + radius * np.cos(angle) / np.cos(np.radians(centroids[:, 0]))
     df = pd.DataFrame(data)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     df.to_csv(output_path, index=False)
@@ -76,8 +88,98 @@ def generate_disease_data(num_rows=15000, output_path="data/raw/clean_hospital_d
     df.to_csv(output_path, index=False)
     print(f"Generated {num_rows} rows for Hospital/Disease Dataset.")
 
+def generate_road_network(grid_size=20, output_path="data/raw/pune_road_network_edges.csv"):
+    """Street grid over the city as an edge list; the depot and each area centroid join their 3 nearest junctions."""
+    np.random.seed(7)
+    lats = np.linspace(18.46, 18.62, grid_size)
+    lons = np.linspace(73.75, 73.93, grid_size)
+    km_per_lat = 111.0
+    km_per_lon = 111.0 * np.cos(np.radians(18.54))
+
+    junctions = {f"J{i:02d}_{j:02d}": (lats[i], lons[j]) for i in range(grid_size) for j in range(grid_size)}
+    edges = []
+    for i in range(grid_size):
+        for j in range(grid_size):
+            for di, dj in ((1, 0), (0, 1)):
+                if i + di < grid_size and j + dj < grid_size and np.random.rand() > 0.1:  # some blocks have no through road
+                    length = abs(lats[i + di] - lats[i]) * km_per_lat + abs(lons[j + dj] - lons[j]) * km_per_lon
+                    edges.append((f"J{i:02d}_{j:02d}", f"J{i + di:02d}_{j + dj:02d}", length * np.random.uniform(1.0, 1.4)))
+
+    names = list(junctions)
+    coords = np.array([junctions[n] for n in names])
+    terminals = dict(AREA_CENTROIDS, Depot=DEPOT_COORDS)
+    for terminal, (lat, lon) in terminals.items():
+        km = np.hypot((coords[:, 0] - lat) * km_per_lat, (coords[:, 1] - lon) * km_per_lon)
+        for k in np.argsort(km)[:3]:
+            edges.append((terminal, names[k], km[k] * 1.2))
+
+    df = pd.DataFrame(edges, columns=["source", "target", "distance_km"]).round({"distance_km": 3})
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    df.to_csv(output_path, index=False)
+    print(f"Generated road network with {len(df)} edges.")
+
+def generate_pipe_network(grid_size=60, num_sensors=100, edges_path="data/raw/pune_water_pipes.csv",
+                          nodes_path="data/raw/pune_water_pipe_nodes.csv",
+                          water_path="data/raw/water_pipeline_monitoring_dataset_15000_rows.csv"):
+    """
+    Water distribution grid over the city: junctions with positions and nearest area, pipes with
+    length and diameter (larger trunk mains every 10th row/column), two reservoirs feeding the
+    corners, and the W_SENS_* pressure sensors. Each sensor sits on a random junction of the area
+    its latest reading in the water feed (water_path) reports, so localisation points at the area
+    whose sensors dropped; sensors the feed does not know go on any junction.
+    """
+    np.random.seed(11)
+    lats = np.linspace(18.46, 18.62, grid_size)
+    lons = np.linspace(73.75, 73.93, grid_size)
+    km_per_lat = 111.0
+    km_per_lon = 111.0 * np.cos(np.radians(18.54))
+
+    names = [f"N{i:03d}_{j:03d}" for i in range(grid_size) for j in range(grid_size)]
+    lat = np.repeat(lats, grid_size)
+    lon = np.tile(lons, grid_size)
+    centroids = np.array(list(AREA_CENTROIDS.values()))
+    nearest = np.argmin((lat[:, None] - centroids[:, 0]) ** 2 + (lon[:, None] - centroids[:, 1]) ** 2, axis=1)
+    nodes = pd.DataFrame({"node": names, "latitude": lat, "longitude": lon,
+                          "area": np.array(list(AREA_CENTROIDS))[nearest], "is_source": 0, "sensor_id": ""})
+
+    pipes = []
+    for i in range(grid_size):
+        for j in range(grid_size):
+            for di, dj in ((1, 0), (0, 1)):
+                if i + di < grid_size and j + dj < grid_size and np.random.rand() > 0.05:
+                    trunk = (i % 10 == 0 and di == 0) or (j % 10 == 0 and dj == 0)
+                    length = (abs(lats[i + di] - lats[i]) * km_per_lat + abs(lons[j + dj] - lons[j]) * km_per_lon) * 1000
+                    diameter = 600 if trunk else np.random.choice([100, 150, 200, 250])
+                    pipes.append((names[i * grid_size + j], names[(i + di) * grid_size + j + dj], round(length, 1), diameter))
+
+    for k, corner in enumerate([names[0], names[-1]]):
+        nodes.loc[len(nodes)] = [f"RES_{k}", nodes.loc[names.index(corner), "latitude"], nodes.loc[names.index(corner), "longitude"],
+                                 nodes.loc[names.index(corner), "area"], 1, ""]
+        pipes.append((f"RES_{k}", corner, 100.0, 900))
+    sensor_area = {}
+    if os.path.exists(water_path):
+        water = pd.read_csv(water_path, usecols=["sensor_id", "area", "timestamp"]).sort_values("timestamp", kind="stable")
+        sensor_area = water.drop_duplicates("sensor_id", keep="last").set_index("sensor_id")["area"].to_dict()
+    junction_area = nodes["area"].to_numpy()[:grid_size * grid_size]
+    free = np.ones(grid_size * grid_size, dtype=bool)
+    for i in range(num_sensors):
+        sensor = f"W_SENS_{i:03d}"
+        candidates = np.flatnonzero(free & (junction_area == sensor_area.get(sensor)))
+        if len(candidates) == 0:
+            candidates = np.flatnonzero(free)
+        row = np.random.choice(candidates)
+        free[row] = False
+        nodes.loc[row, "sensor_id"] = sensor
+
+    os.makedirs(os.path.dirname(edges_path), exist_ok=True)
+    pd.DataFrame(pipes, columns=["source", "target", "length_m", "diameter_mm"]).to_csv(edges_path, index=False)
+    nodes.to_csv(nodes_path, index=False)
+    print(f"Generated pipe network with {len(pipes)} pipes and {num_sensors} sensors.")
+
 if __name__ == "__main__":
     generate_waste_data()
     generate_water_data()
     generate_disease_data()
+    generate_road_network()
+    generate_pipe_network()
     print("All synthetic data generated successfully.")
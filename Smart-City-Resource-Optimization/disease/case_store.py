@@ -0,0 +1,95 @@
+import os
+import pandas as pd
+
+CASE_STORE_DIR = "data/processed/disease_cases"
+KEYS = ['area', 'disease', 'week_start']
+
+def week_start(dates: pd.Series) -> pd.Series:
+    """Monday of each date's week."""
+    dates = pd.to_datetime(dates)
+    return (dates - pd.to_timedelta(dates.dt.dayofweek, unit='D')).rename('week_start')
+
+class WeeklyCaseStore:
+    """
+    Persistent weekly case counts per (area, disease, week_start), kept up to date by merging
+    hospital records as they arrive instead of regrouping the full history.
+    A ledger of every merged record's contribution (keyed by record_id) makes merges idempotent
+    and turns a re-sent record into a correction: its old contribution is taken back out of the
+    week it was counted in before the new one is added, so late fixes to past weeks are exact.
+    Each cell also counts its records, so a week left without records disappears.
+    With a root directory the cells and ledger are saved there as parquet.
+    """
+    def __init__(self, root: str = None):
+        self.root = root
+        self.cells = pd.DataFrame({'cases': pd.Series(dtype='int64'), 'records': pd.Series(dtype='int64')},
+                                  index=pd.MultiIndex.from_arrays([[], [], pd.DatetimeIndex([])], names=KEYS))
+        self.ledger = pd.DataFrame({'area': pd.Series(dtype=str), 'disease': pd.Series(dtype=str),
+                                    'week_start': pd.Series(dtype='datetime64[ns]'), 'cases': pd.Series(dtype='int64')},
+                                   index=pd.Index([], dtype=str, name='record_id'))
+        if root is not None and os.path.exists(os.path.join(root, "cells.parquet")):
+            self.cells = pd.read_parquet(os.path.join(root, "cells.parquet")).set_index(KEYS)
+            self.ledger = pd.read_parquet(os.path.join(root, "ledger.parquet")).set_index('record_id')
+
+    def __len__(self):
+        return len(self.cells)
+
+    def merge(self, records: pd.DataFrame, complete: bool = False) -> dict:
+        """
+        Fold hospital records (record_id, area, disease, date, cases) into the counts.
+        Records already merged with the same values are skipped. With complete, records are the whole
+        current dataset (e.g. the full raw file): merged records missing from it are retracted, so a
+        rewritten or truncated file does not leave stale counts behind.
+        Returns counts of new, corrected, unchanged and retracted records.
+        """
+        incoming = pd.DataFrame({
+            'area': records['area'].astype(str).to_numpy(),
+            'disease': records['disease'].astype(str).to_numpy(),
+            'week_start': week_start(records['date']).to_numpy(),
+            'cases': records['cases'].to_numpy(dtype='int64'),
+        }, index=pd.Index(records['record_id'].astype(str).to_numpy(), name='record_id'))
+        incoming = incoming[~incoming.index.duplicated(keep='last')]
+
+        previous = self.ledger.reindex(incoming.index)
+        known = previous['cases'].notna().to_numpy()
+        same = known & (previous[KEYS + ['cases']].to_numpy() == incoming[KEYS + ['cases']].to_numpy()).all(axis=1)
+        corrected = known & ~same
+        changed = ~same
+        gone = self.ledger.index.difference(incoming.index) if complete else self.ledger.index[:0]
+        summary = {"new": int((~known).sum()), "corrected": int(corrected.sum()), "unchanged": int(same.sum()),
+                   "retracted": len(gone)}
+        if not changed.any() and len(gone) == 0:
+            return summary
+
+        added = incoming[changed].assign(records=1)
+        removed = pd.concat([previous[corrected], self.ledger.loc[gone]]).assign(cases=lambda d: -d['cases'], records=-1)
+        delta = pd.concat([added, removed]).groupby(KEYS)[['cases', 'records']].sum()
+        cells = self.cells.add(delta, fill_value=0)
+        self.cells = cells[cells['records'] > 0].astype('int64').sort_index()
+        self.ledger = pd.concat([self.ledger.drop(incoming.index[corrected].append(gone)), incoming[changed]])
+        if self.root is not None:
+            self.save()
+        return summary
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        for name, frame in (("cells", self.cells), ("ledger", self.ledger)):
+            tmp_path = os.path.join(self.root, f"{name}.parquet.tmp")
+            frame.reset_index().to_parquet(tmp_path)
+            os.replace(tmp_path, os.path.join(self.root, f"{name}.parquet"))
+
+    def weekly(self) -> pd.DataFrame:
+        """All counts in the aggregate_disease_data shape (area, disease, week_start, cases), sorted."""
+        return self.cells['cases'].reset_index()
+
+    def series(self, area: str, disease: str) -> pd.Series:
+        """Weekly cases of one (area, disease), indexed by week_start."""
+        if (area, disease) not in self.cells.index.droplevel('week_start'):
+            return pd.Series(dtype='int64', index=pd.DatetimeIndex([], name='week_start'), name='cases')
+        return self.cells.loc[(area, disease), 'cases']
+
+    def latest_weeks(self, n: int = 2) -> pd.DataFrame:
+        """The last n weeks on record of every (area, disease) series, in the weekly() shape."""
+        return self.cells['cases'].groupby(level=['area', 'disease'], sort=False).tail(n).reset_index()
+
+def load_case_store(base_path: str = "") -> WeeklyCaseStore:
+    return WeeklyCaseStore(os.path.join(base_path, CASE_STORE_DIR))
@@ -2,7 +2,7 @@ from pydantic import BaseModel, Field
 import datetime
 
 class DiseaseRecord(BaseModel):
-    record_id: str = Field(..., description="Unique identifier for the hospital record")
+    record_id: str = Field(..., description="Unique identifier for the hospital record", json_schema_extra={"unique": True})
     area: str = Field(..., description="City zone where the cases originated")
     disease: str = Field(..., description="Type of disease (e.g., Dengue, Malaria)")
     date: datetime.date = Field(..., description="Date the cases were reported")
@@ -4,29 +4,38 @@ from sklearn.linear_model import LinearRegression
 import pickle
 import os
 
+from disease.case_store import week_start
+
 def aggregate_disease_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Group by area, disease, and week to get counts."""
-    # Ensure date is datetime
-    if not pd.api.types.is_datetime64_any_dtype(df['date']):
-        df['date'] = pd.to_datetime(df['date'])
-        
-    df['week_start'] = df['date'] - pd.to_timedelta(df['date'].dt.dayofweek, unit='d')
-    
-    weekly = df.groupby(['area', 'disease', 'week_start'])['cases'].sum().reset_index()
+    """
+    Group by area, disease, and week to get counts.
+    Also accepts an iterable of chunks; partial weekly sums are combined at the end.
+    """
+    if not isinstance(df, pd.DataFrame):
+        partials = [aggregate_disease_data(chunk) for chunk in df]
+        if not partials:
+            return pd.DataFrame(columns=['area', 'disease', 'week_start', 'cases'])
+        weekly = pd.concat(partials, ignore_index=True)
+        weekly = weekly.groupby(['area', 'disease', 'week_start'], observed=True)['cases'].sum().reset_index()
+        return weekly.sort_values(by=['area', 'disease', 'week_start'])
+
+    # Week keys are computed on the side so the caller's frame is left untouched
+    weekly = df.groupby([df['area'], df['disease'], week_start(df['date'])], observed=True)['cases'].sum().reset_index()
     weekly = weekly.sort_values(by=['area', 'disease', 'week_start'])
     return weekly
 
-def train_disease_trend_model(df: pd.DataFrame, model_path="models/disease_trend_model.pkl", base_path=""):
+def train_disease_trend_model(df: pd.DataFrame, model_path="models/disease_trend_model.pkl", base_path="", weekly=None):
     """
     Train a simple Linear Regression model for trend prediction.
     Features: lag_1_week, lag_2_week
+    weekly (e.g. from disease.case_store.WeeklyCaseStore.weekly) skips aggregating df.
     """
     full_model_path = os.path.join(base_path, model_path)
-    weekly = aggregate_disease_data(df)
+    weekly = aggregate_disease_data(df) if weekly is None else weekly.copy()
     
     # Create lag features
-    weekly['cases_lag_1'] = weekly.groupby(['area', 'disease'])['cases'].shift(1)
-    weekly['cases_lag_2'] = weekly.groupby(['area', 'disease'])['cases'].shift(2)
+    weekly['cases_lag_1'] = weekly.groupby(['area', 'disease'], observed=True)['cases'].shift(1)
+    weekly['cases_lag_2'] = weekly.groupby(['area', 'disease'], observed=True)['cases'].shift(2)
     
     # Drop NAs
     model_df = weekly.dropna()
@@ -46,44 +55,61 @@ def train_disease_trend_model(df: pd.DataFrame, model_path="models/disease_trend
         
     return weekly, model
 
-def generate_disease_alerts(df: pd.DataFrame, threshold: int = 15, growth_rate_threshold: float = 1.2):
+def load_disease_trend_model(model_path="models/disease_trend_model.pkl", base_path=""):
+    """Saved trend model, or None if it has not been trained yet."""
+    full_model_path = os.path.join(base_path, model_path)
+    if not os.path.exists(full_model_path) or os.path.getsize(full_model_path) == 0:
+        return None
+    with open(full_model_path, "rb") as f:
+        return pickle.load(f)
+
+def generate_disease_alerts(df: pd.DataFrame, threshold: int = 15, growth_rate_threshold: float = 1.2, trend_model=None):
     """
     Alert Rule: If predicted_cases > threshold AND growth_rate > X -> alert
     For simplicity, we use the latest week's data to calculate current growth rate.
+    trend_model (see train_disease_trend_model) replaces the momentum prediction, see alerts_from_weekly.
     """
-    weekly = aggregate_disease_data(df)
-    
-    # Get latest two weeks per area-disease
-    latest = weekly.groupby(['area', 'disease']).tail(2)
-    
-    alerts = []
-    
-    for (area, disease), group in latest.groupby(['area', 'disease']):
-        if len(group) == 2:
-            prev_cases = group.iloc[0]['cases']
-            curr_cases = group.iloc[1]['cases']
-            
-            # Simple prediction: moving average + momentum
-            if prev_cases == 0:
-                growth_rate = 1.0
-            else:
-                growth_rate = curr_cases / prev_cases
-                
-            predicted_next = curr_cases * growth_rate
-            
-            is_alert = (predicted_next > threshold) and (growth_rate > growth_rate_threshold)
-            
-            alerts.append({
-                'area': area,
-                'disease': disease,
-                'current_cases': curr_cases,
-                'growth_rate': round(growth_rate, 2),
-                'predicted_next_week': round(predicted_next, 2),
-                'is_alert': is_alert
-            })
-            
-    alerts_df = pd.DataFrame(alerts)
-    return alerts_df
+    return alerts_from_weekly(aggregate_disease_data(df), threshold, growth_rate_threshold, trend_model)
+
+def alerts_from_weekly(weekly: pd.DataFrame, threshold: int = 15, growth_rate_threshold: float = 1.2, trend_model=None):
+    """
+    Apply the alert rule to weekly (area, disease, week_start, cases) counts, one row per
+    (area, disease) series with at least two weeks, in the DiseaseAlert shape.
+    The last two weeks of every series are picked out in one pass over the sorted counts.
+    growth_rate = current / previous week (1.0 after a zero week). predicted_next_week is
+    current * growth_rate (momentum), or with trend_model its prediction from the
+    (cases_lag_1, cases_lag_2) = (current, previous) week features it was trained on.
+    """
+    columns = ['area', 'disease', 'current_cases', 'growth_rate', 'predicted_next_week', 'is_alert']
+    area_codes, areas = pd.factorize(weekly['area'], sort=True)
+    disease_codes, diseases = pd.factorize(weekly['disease'], sort=True)
+    order = np.lexsort((weekly['week_start'].to_numpy(), disease_codes, area_codes))
+    series = area_codes[order].astype(np.int64) * len(diseases) + disease_codes[order]
+    # Last row of each series, and its predecessor when the series has one
+    last = np.flatnonzero(np.r_[series[1:] != series[:-1], True]) if len(order) else np.zeros(0, dtype=int)
+    first = np.r_[0, last[:-1] + 1]
+    last = last[last > first]
+    if len(last) == 0:
+        return pd.DataFrame(columns=columns)
+
+    cases = weekly['cases'].to_numpy()[order]
+    curr_cases = cases[last]
+    prev_cases = cases[last - 1]
+    growth_rate = np.divide(curr_cases, prev_cases, out=np.ones(len(last)), where=prev_cases != 0)
+    if trend_model is None:
+        predicted_next = curr_cases * growth_rate
+    else:
+        features = pd.DataFrame({'cases_lag_1': curr_cases, 'cases_lag_2': prev_cases})
+        predicted_next = trend_model.predict(features)
+
+    return pd.DataFrame({
+        'area': np.asarray(areas, dtype=object)[area_codes[order][last]],
+        'disease': np.asarray(diseases, dtype=object)[disease_codes[order][last]],
+        'current_cases': curr_cases,
+        'growth_rate': np.round(growth_rate, 2),
+        'predicted_next_week': np.round(predicted_next, 2),
+        'is_alert': (predicted_next > threshold) & (growth_rate > growth_rate_threshold),
+    })
 
 if __name__ == "__main__":
     from src.ingestion.preprocess import load_and_preprocess
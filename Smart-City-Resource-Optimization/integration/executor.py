@@ -0,0 +1,53 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+BACKENDS = ("serial", "thread", "process")
+
+def default_backend() -> str:
+    """Backend from SMARTCITY_PIPELINE_BACKEND, falling back to serial execution."""
+    return os.environ.get("SMARTCITY_PIPELINE_BACKEND", "serial")
+
+def default_workers():
+    workers = os.environ.get("SMARTCITY_PIPELINE_WORKERS")
+    return int(workers) if workers else None
+
+def pool_size(n_tasks: int, backend: str = None, max_workers: int = None) -> int:
+    """Workers run_domain_tasks uses for n_tasks: 1 when serial, else max_workers, the env override or min(tasks, CPUs)."""
+    if (backend or default_backend()) == "serial":
+        return 1
+    return max_workers or default_workers() or max(1, min(n_tasks, os.cpu_count() or 1))
+
+def _timed_call(fn, args, kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run_domain_tasks(tasks: dict, backend: str = None, max_workers: int = None) -> tuple:
+    """
+    Run independent tasks {name: (fn, args, kwargs)} on a serial, thread or process backend.
+    Functions must be module-level for the process backend.
+    Without an explicit max_workers the pool runs one worker per task, capped at the CPU count.
+    Returns (results, timings) where timings holds per-task and total wall time in seconds.
+    """
+    backend = backend or default_backend()
+    max_workers = pool_size(len(tasks), backend, max_workers)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+    start = time.perf_counter()
+    results, timings = {}, {}
+    if backend == "serial":
+        for name, (fn, args, kwargs) in tasks.items():
+            results[name], timings[name] = _timed_call(fn, args, kwargs)
+    else:
+        pool_cls = ThreadPoolExecutor if backend == "thread" else ProcessPoolExecutor
+        with pool_cls(max_workers=max_workers) as pool:
+            futures = {name: pool.submit(_timed_call, fn, args, kwargs) for name, (fn, args, kwargs) in tasks.items()}
+            for name, future in futures.items():
+                results[name], timings[name] = future.result()
+    timings["total"] = time.perf_counter() - start
+    return results, timings
+
+def format_timings(timings: dict) -> str:
+    return " | ".join(f"{name}: {seconds:.2f}s" for name, seconds in timings.items())
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import pandas as pd
+
+# Loaded models per process, keyed by artifact path: registry lookups after the first are dict hits
+_LOADED = {}
+# Versions kept on disk besides the current one; older ones are pruned on register
+KEEP_VERSIONS = 5
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Content hash of a frame's values (row order included), used to recognise an identical training set."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+class ModelRegistry:
+    """
+    Versioned model artifacts under root: <root>/v0001/model.pkl + meta.json, with current.json
+    pointing at the version in use. Metadata records what the model was trained on
+    (training window, features, data hash, ...) so callers can decide when to retrain.
+    Only the newest `keep` versions and the current one are kept on disk.
+    """
+    def __init__(self, root: str, keep: int = KEEP_VERSIONS):
+        self.root = root
+        self.keep = keep
+
+    def _version_dir(self, version: int) -> str:
+        return os.path.join(self.root, f"v{version:04d}")
+
+    def versions(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(int(name[1:]) for name in os.listdir(self.root) if name.startswith("v") and name[1:].isdigit())
+
+    def register(self, model, metadata: dict) -> dict:
+        """Save model as the next version and make it current. Returns the stored metadata."""
+        os.makedirs(self.root, exist_ok=True)
+        while True:
+            # Claiming the directory is the lock: a concurrent register that took this number makes us retry
+            version = (self.versions() or [0])[-1] + 1
+            version_dir = self._version_dir(version)
+            try:
+                os.makedirs(version_dir, exist_ok=False)
+                break
+            except FileExistsError:
+                continue
+        metadata = dict(metadata, version=version, created_at=pd.Timestamp.now().isoformat())
+        with open(os.path.join(version_dir, "model.pkl"), "wb") as f:
+            pickle.dump(model, f)
+        with open(os.path.join(version_dir, "meta.json"), "w") as f:
+            json.dump(metadata, f, indent=2, default=str)
+
+        # Swap the pointer atomically so readers never see a half-written current.json
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix="current.json.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": version}, f)
+        os.replace(tmp_path, os.path.join(self.root, "current.json"))
+        _LOADED[os.path.join(version_dir, "model.pkl")] = model
+        self.prune()
+        return metadata
+
+    def prune(self):
+        """Delete versions older than the newest `keep`, never the current one."""
+        current = (self.current_metadata() or {}).get("version")
+        for version in self.versions()[:-self.keep] if self.keep else self.versions():
+            if version == current:
+                continue
+            version_dir = self._version_dir(version)
+            _LOADED.pop(os.path.join(version_dir, "model.pkl"), None)
+            shutil.rmtree(version_dir, ignore_errors=True)
+
+    def current_metadata(self):
+        """Metadata of the current version, or None if nothing is registered."""
+        pointer = os.path.join(self.root, "current.json")
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer, "r") as f:
+            version = json.load(f)["version"]
+        with open(os.path.join(self._version_dir(version), "meta.json"), "r") as f:
+            return json.load(f)
+
+    def load(self, version: int):
+        """Model of a given version, unpickled at most once per process."""
+        path = os.path.join(self._version_dir(version), "model.pkl")
+        if path not in _LOADED:
+            with open(path, "rb") as f:
+                _LOADED[path] = pickle.load(f)
+        return _LOADED[path]
+
+    def load_current(self) -> tuple:
+        """(model, metadata) of the current version, or (None, None)."""
+        metadata = self.current_metadata()
+        if metadata is None:
+            return None, None
+        return self.load(metadata["version"]), metadata
@@ -0,0 +1,122 @@
+import pandas as pd
+
+from integration.executor import run_domain_tasks, format_timings
+from integration.risk_table import (
+    load_waste_data, load_water_data, load_disease_data, latest_water_window,
+    waste_risk_scores, water_risk_scores, disease_risk_scores, fuse_area_risk, get_city_health_score
+)
+from waste.priority_index import BinPriorityIndex
+from waste.forecast import fit_fill_rates, collection_schedule
+from water.anomaly_demand import detect_leaks, train_demand_prediction_model
+from water.timeseries_store import SensorTimeSeriesStore
+from water.forecast import train_area_demand_model
+from water.usage_cube import UsageCube
+from water.pipe_network import load_pipe_network, pressure_deviations
+from disease.trend_alerts import alerts_from_weekly, train_disease_trend_model
+from disease.case_store import load_case_store
+
+def run_waste_pipeline(base_path: str = "") -> dict:
+    """
+    Load waste data, prioritize bins, forecast fills and score area waste risk.
+    "index" is the live BinPriorityIndex; callers re-rank bins through it instead of recomputing "prio".
+    "schedule" is the predicted multi-day collection plan (see waste.forecast.bins_for_day to route a day).
+    """
+    waste_df = load_waste_data(base_path)
+    index = BinPriorityIndex(waste_df)
+    # Rates are refit from the readings on every refresh; only train_fill_rate_model saves them
+    fill_rates = fit_fill_rates(waste_df)
+    schedule, _ = collection_schedule(fill_rates, waste_df)
+    return {
+        "prio": index.bins,
+        "high_prio": index.high_priority_frame(),
+        "index": index,
+        "schedule": schedule,
+        "risk": waste_risk_scores(waste_df),
+    }
+
+def run_water_pipeline(base_path: str = "", water_store_root: str = None) -> dict:
+    """
+    Load water data, detect leaks in the last 24h (registered model, retrained when stale or drifted), fit demand and score area water risk.
+    "area_forecast" is the hourly per-area demand forecast for the next 72h (see water.forecast).
+    "usage_cube" answers per-area / day-of-week / hour usage questions; "peaks" is its city-wide hourly mean.
+    "leak_candidates" ranks pipe segments against the window's pressure deviations (None without a pipe network).
+    With water_store_root the readings are first synced into the memory-mapped SensorTimeSeriesStore
+    there (only rows past each sensor's last stored timestamp are written) and the 24h slice is read from it.
+    """
+    water_df = load_water_data(base_path)
+    if water_store_root:
+        store = SensorTimeSeriesStore(water_store_root)
+        store.append(water_df, skip_stored=True)
+        latest_water = latest_water_window(store)
+    else:
+        latest_water = latest_water_window(water_df)
+    if len(latest_water) > 0:
+        latest_water = detect_leaks(latest_water, base_path=base_path)
+    water_demand, _ = train_demand_prediction_model(water_df.copy(), base_path=base_path)
+    area_forecast, _ = train_area_demand_model(water_df, base_path=base_path)
+    usage_cube = UsageCube().update(water_df)
+    pipe_network = load_pipe_network(base_path)
+    leak_candidates = None
+    if pipe_network is not None and len(latest_water) > 0:
+        baseline = water_df['pressure_psi'].groupby(water_df['sensor_id'].astype(str)).median()
+        leak_candidates = pipe_network.localize(pressure_deviations(latest_water, baseline))
+    return {
+        "peaks": usage_cube.hourly(),
+        "usage_cube": usage_cube,
+        "anomalies": latest_water[latest_water['leak_risk_level'] == "High Risk"] if len(latest_water) > 0 else latest_water,
+        "demand": water_demand,
+        "area_forecast": area_forecast,
+        "leak_candidates": leak_candidates,
+        "risk": water_risk_scores(latest_water),
+    }
+
+def run_disease_pipeline(base_path: str = "", use_trend_model: bool = False) -> dict:
+    """
+    Load hospital data, generate alerts and score area disease risk.
+    Weekly counts come from the persistent WeeklyCaseStore, which only applies new or corrected records
+    and retracts records that are no longer in the raw file.
+    With use_trend_model the alerts' next-week predictions come from a freshly trained trend model.
+    """
+    disease_df = load_disease_data(base_path)
+    cases = load_case_store(base_path)
+    cases.merge(disease_df, complete=True)
+    weekly = cases.weekly()
+    trend_model = None
+    if use_trend_model:
+        _, trend_model = train_disease_trend_model(disease_df, base_path=base_path, weekly=weekly)
+    alerts = alerts_from_weekly(cases.latest_weeks(2), trend_model=trend_model)
+    return {
+        "alerts": alerts,
+        "weekly": weekly,
+        "risk": disease_risk_scores(alerts),
+    }
+
+def refresh_city_data(base_path: str = "", backend: str = None, max_workers: int = None, water_store_root: str = None) -> dict:
+    """
+    Run the waste, water and disease pipelines (independent until fusion) on the chosen
+    backend, then fuse their area scores into the unified risk table.
+    Returns the dashboard data dict plus per-domain wall times under "timings".
+    """
+    results, timings = run_domain_tasks({
+        "waste": (run_waste_pipeline, (base_path,), {}),
+        "water": (run_water_pipeline, (base_path,), {"water_store_root": water_store_root}),
+        "disease": (run_disease_pipeline, (base_path,), {}),
+    }, backend=backend, max_workers=max_workers)
+
+    waste, water, disease = results["waste"], results["water"], results["disease"]
+    risk_table = fuse_area_risk(waste.pop("risk"), water.pop("risk"), disease.pop("risk"), base_path=base_path)
+    print(f"City refresh ({format_timings(timings)})")
+    return {
+        "risk_table": risk_table,
+        "health_score": get_city_health_score(risk_table),
+        "waste": waste,
+        "water": water,
+        "disease": disease,
+        "timings": timings,
+    }
+
+if __name__ == "__main__":
+    import sys
+    backend = sys.argv[1] if len(sys.argv) > 1 else "thread"
+    data = refresh_city_data(backend=backend)
+    print(data["risk_table"][['area', 'final_risk_score', 'cross_domain_alert']].head())
@@ -1,4 +1,13 @@
 import pandas as pd
+import numpy as np
+import hashlib
+import glob
+import json
+import os
+
+from integration.schema import read_schema, apply_final_dtypes
+
+CACHE_FORMAT_VERSION = 2
 
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """Drop NA and duplicate rows."""
@@ -23,11 +32,188 @@ def encode_categories(df: pd.DataFrame, cat_cols: list) -> pd.DataFrame:
             df[col] = df[col].astype('category')
     return df
 
-def load_and_preprocess(filepath: str, time_col: str=None, cat_cols: list=None) -> pd.DataFrame:
-    df = pd.read_csv(filepath)
+def file_content_hash(filepath: str, block_size: int = 1 << 20) -> str:
+    """SHA-1 of the raw file bytes, read in blocks."""
+    h = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _cache_key(**params) -> str:
+    """Hash of the preprocessing arguments; the raw file's content is tracked in the cache's sidecar."""
+    payload = json.dumps({"v": CACHE_FORMAT_VERSION, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+def _cache_path(filepath: str, key: str) -> str:
+    """Cache files live next to the raw file: <name>.<key>.parquet, described by <name>.<key>.parquet.json"""
+    stem, _ = os.path.splitext(filepath)
+    return f"{stem}.{key}.parquet"
+
+def _file_stamp(filepath: str) -> dict:
+    st = os.stat(filepath)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _read_sidecar(cache_path: str):
+    try:
+        with open(f"{cache_path}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_sidecar(cache_path: str, content_hash: str, stamp: dict):
+    tmp_path = f"{cache_path}.json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"data": content_hash, **stamp}, f)
+    os.replace(tmp_path, f"{cache_path}.json")
+
+class _ContentHash:
+    """The raw file's SHA-1, computed at most once per call and only when size+mtime cannot vouch for a cache."""
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._value = None
+
+    def __call__(self) -> str:
+        if self._value is None:
+            self._value = file_content_hash(self.filepath)
+        return self._value
+
+def _cache_is_fresh(cache_path: str, stamp: dict, content_hash: _ContentHash) -> bool:
+    meta = _read_sidecar(cache_path)
+    if meta is None or not os.path.exists(cache_path):
+        return False
+    if meta.get("size") == stamp["size"] and meta.get("mtime_ns") == stamp["mtime_ns"]:
+        return True
+    if meta.get("size") != stamp["size"] or meta.get("data") != content_hash():
+        return False
+    # Touched but unchanged: refresh the stamp so the next call skips the hash again
+    _write_sidecar(cache_path, meta["data"], stamp)
+    return True
+
+def _remove_stale_caches(filepath: str, content_hash: str):
+    """
+    Drop caches of this raw file built from other contents. Caches for other preprocessing
+    arguments over the same contents are kept, so callers with different params don't evict each other.
+    """
+    stem, _ = os.path.splitext(filepath)
+    for path in glob.glob(f"{glob.escape(stem)}.*.parquet"):
+        meta = _read_sidecar(path)
+        if meta is not None and meta.get("data") == content_hash:
+            continue
+        for stale in (path, f"{path}.json"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+def _read_cache(path: str):
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        print(f"Ignoring unreadable cache {path}: {e}")
+        return None
+
+def _write_cache(df: pd.DataFrame, path: str):
+    # Write to a temp file first so a crashed run never leaves a half-written cache behind
+    tmp_path = f"{path}.tmp"
+    try:
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"Could not write cache {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+def _read_kwargs(filepath: str, schema) -> tuple:
+    """read_csv keyword arguments and post-clean casts derived from a record model."""
+    if schema is None:
+        return {}, {}
+    columns = pd.read_csv(filepath, nrows=0).columns
+    spec = read_schema(schema, columns=columns)
+    return {"dtype": spec["dtype"], "parse_dates": spec["parse_dates"]}, spec["final_dtypes"]
+
+def load_and_preprocess(filepath: str, time_col: str=None, cat_cols: list=None, use_cache: bool=True, schema=None) -> pd.DataFrame:
+    """
+    Load a raw CSV, clean it and convert types.
+    If schema (a pydantic record model such as WasteRecord) is given, columns get compact
+    dtypes derived from it: categoricals for strings and timestamps parsed at read time,
+    float32/int8 for bounded numerics once the column holds nothing a cast would corrupt.
+    The cleaned frame is cached as Parquet next to the raw file, one cache per set of
+    preprocessing arguments. A sidecar records the file's size, mtime and content hash:
+    an untouched file is recognised from size+mtime alone, the full hash is only computed
+    when they change, and unchanged files skip parsing entirely.
+    """
+    read_kwargs, final_dtypes = _read_kwargs(filepath, schema)
+    cache_path = None
+    if use_cache:
+        cache_path = _cache_path(filepath, _cache_key(time_col=time_col, cat_cols=cat_cols, read_kwargs=read_kwargs))
+        stamp = _file_stamp(filepath)
+        content_hash = _ContentHash(filepath)
+        if _cache_is_fresh(cache_path, stamp, content_hash):
+            df = _read_cache(cache_path)
+            if df is not None:
+                return df
+
+    df = pd.read_csv(filepath, **read_kwargs)
     df = clean_data(df)
+    df = apply_final_dtypes(df, final_dtypes)
     if time_col:
         df = convert_timestamps(df, time_col)
     if cat_cols:
         df = encode_categories(df, cat_cols)
+
+    if cache_path and _write_cache(df, cache_path):
+        _write_sidecar(cache_path, content_hash(), stamp)
+        _remove_stale_caches(filepath, content_hash())
     return df
+
+class RowHashSet:
+    """
+    Compact set of 64-bit row hashes (8 bytes per row) stored as a few sorted runs.
+    Runs of similar size are merged, so inserts stay amortized O(log n) per row.
+    """
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(r) for r in self.runs)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            pos = np.searchsorted(run, hashes).clip(max=len(run) - 1)
+            found |= run[pos] == hashes
+        return found
+
+    def add(self, hashes: np.ndarray):
+        run = np.unique(hashes.astype(np.uint64))
+        if len(run) == 0:
+            return
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.union1d(self.runs.pop(), run)
+        self.runs.append(run)
+
+def iter_preprocessed_chunks(filepath: str, time_col: str=None, cat_cols: list=None, chunksize: int=100_000, schema=None):
+    """
+    Streaming variant of load_and_preprocess for CSVs larger than memory.
+    Yields cleaned, timestamp-converted chunks. Duplicates are removed across chunk
+    boundaries using a RowHashSet, so only one chunk of rows is resident at a time.
+    """
+    read_kwargs, final_dtypes = _read_kwargs(filepath, schema)
+    seen = RowHashSet()
+    for chunk in pd.read_csv(filepath, chunksize=chunksize, **read_kwargs):
+        chunk = chunk.dropna()
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy() & ~seen.contains(hashes)
+        seen.add(hashes[keep])
+        chunk = chunk[keep].copy()
+        if chunk.empty:
+            continue
+        chunk = apply_final_dtypes(chunk, final_dtypes)
+        if time_col:
+            chunk = convert_timestamps(chunk, time_col)
+        if cat_cols:
+            chunk = encode_categories(chunk, cat_cols)
+        yield chunk
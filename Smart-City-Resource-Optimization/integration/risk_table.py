@@ -3,50 +3,122 @@ import numpy as np
 import os
 
 from integration.preprocess import load_and_preprocess
+from integration.validation import quarantine_invalid
+from integration.executor import run_domain_tasks, format_timings
 from waste.routing import calculate_bin_priority
-from water.anomaly_demand import train_leak_detection_model
+from water.anomaly_demand import detect_leaks
 from disease.trend_alerts import generate_disease_alerts
+from waste.models import WasteRecord
+from water.models import WaterSensorRecord
+from disease.models import DiseaseRecord
 
-def load_all_data(base_path: str = ""):
-    waste_path = os.path.join(base_path, "data/raw/pune_waste_management_dataset_15000_rows.csv")
-    water_path = os.path.join(base_path, "data/raw/water_pipeline_monitoring_dataset_15000_rows.csv")
-    disease_path = os.path.join(base_path, "data/raw/clean_hospital_dataset_15000_rows.csv")
-    
-    waste_df = load_and_preprocess(waste_path)
-    water_df = load_and_preprocess(water_path, time_col="timestamp")
-    disease_df = load_and_preprocess(disease_path, time_col="date")
-    return waste_df, water_df, disease_df
+WASTE_PATH = "data/raw/pune_waste_management_dataset_15000_rows.csv"
+WATER_PATH = "data/raw/water_pipeline_monitoring_dataset_15000_rows.csv"
+DISEASE_PATH = "data/raw/clean_hospital_dataset_15000_rows.csv"
 
-def generate_area_risk_table(waste_df: pd.DataFrame, water_df: pd.DataFrame, disease_df: pd.DataFrame, base_path: str = "") -> pd.DataFrame:
+def load_waste_data(base_path: str = "") -> pd.DataFrame:
+    waste_df = load_and_preprocess(os.path.join(base_path, WASTE_PATH), schema=WasteRecord)
+    # Quarantine rows that break the record models before they reach any model
+    return quarantine_invalid(waste_df, WasteRecord, "waste", base_path=base_path)
+
+def load_water_data(base_path: str = "") -> pd.DataFrame:
+    water_df = load_and_preprocess(os.path.join(base_path, WATER_PATH), time_col="timestamp", schema=WaterSensorRecord)
+    return quarantine_invalid(water_df, WaterSensorRecord, "water", base_path=base_path)
+
+def load_disease_data(base_path: str = "") -> pd.DataFrame:
+    disease_df = load_and_preprocess(os.path.join(base_path, DISEASE_PATH), time_col="date", schema=DiseaseRecord)
+    return quarantine_invalid(disease_df, DiseaseRecord, "disease", base_path=base_path)
+
+def load_all_data(base_path: str = "", backend: str = None, max_workers: int = None):
     """
-    Fuses risk across the three domains to create a Unified Area Risk Table.
+    Load the three domain datasets. backend ("serial", "thread" or "process") and max_workers
+    control whether the loads fan out across a pool (see integration.executor).
+    """
+    results, timings = run_domain_tasks({
+        "waste": (load_waste_data, (base_path,), {}),
+        "water": (load_water_data, (base_path,), {}),
+        "disease": (load_disease_data, (base_path,), {}),
+    }, backend=backend, max_workers=max_workers)
+    print(f"Loaded domain data ({format_timings(timings)})")
+    return results["waste"], results["water"], results["disease"]
+
+def area_mean_priority(waste_df) -> pd.DataFrame:
+    """
+    Mean bin priority per area. waste_df may be a DataFrame or an iterable of chunks
+    (see integration.preprocess.iter_preprocessed_chunks); chunks are reduced to
+    per-area sums and counts so the full history never has to be in memory.
+    """
+    if isinstance(waste_df, pd.DataFrame):
+        waste_prio = calculate_bin_priority(waste_df)
+        return waste_prio.groupby('area', observed=True)['priority'].mean().reset_index()
+
+    totals = None
+    for chunk in waste_df:
+        part = calculate_bin_priority(chunk).groupby('area', observed=True)['priority'].agg(['sum', 'count'])
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=['area', 'priority'])
+    totals = totals.sort_index()
+    return pd.DataFrame({'area': totals.index.astype(str), 'priority': (totals['sum'] / totals['count']).to_numpy()})
+
+def latest_water_window(water_df, days: float = 1) -> pd.DataFrame:
     """
-    # 1. Waste Risk (Average Priority per area)
-    waste_prio = calculate_bin_priority(waste_df)
-    waste_risk = waste_prio.groupby('area')['priority'].mean().reset_index()
-    # Normalize 0-100
+    Readings within `days` of the newest timestamp.
+    water_df may also be a water.timeseries_store.SensorTimeSeriesStore, which slices
+    each sensor's memory-mapped columns by binary search instead of masking every row.
+    """
+    if not isinstance(water_df, pd.DataFrame):
+        return water_df.latest_window(days=days)
+    times = water_df['timestamp']
+    cutoff = times.max() - pd.Timedelta(days=days)
+    if times.is_monotonic_increasing:
+        return water_df.iloc[times.searchsorted(cutoff, side="left"):].copy()
+    return water_df[times >= cutoff].copy()
+
+def waste_risk_scores(waste_df) -> pd.DataFrame:
+    """Waste Risk (Average Priority per area), normalized 0-100."""
+    waste_risk = area_mean_priority(waste_df)
     w_min = waste_risk['priority'].min()
     w_max = waste_risk['priority'].max()
     waste_risk['waste_risk_score'] = ((waste_risk['priority'] - w_min) / (w_max - w_min + 1e-9) * 100).clip(0, 100)
+    return waste_risk
+
+def water_risk_scores(latest_water: pd.DataFrame) -> pd.DataFrame:
+    """Water Risk (Percentage of High Risk anomalies per area) from an already scored window."""
+    if len(latest_water) == 0:
+        return pd.DataFrame(columns=['area', 'water_risk_score'])
+    is_anomaly = (latest_water['leak_risk_level'] == "High Risk").astype(int).rename('is_anomaly')
+    water_risk = is_anomaly.groupby(latest_water['area'], observed=True).mean().reset_index()
+    water_risk['water_risk_score'] = (water_risk['is_anomaly'] * 100).clip(0, 100) # Percentage of readings that are anomalies
+    return water_risk
+
+def disease_risk_scores(alerts: pd.DataFrame) -> pd.DataFrame:
+    """Disease Risk (Number of alerts per area)."""
+    if len(alerts) == 0:
+        return pd.DataFrame(columns=['area', 'disease_risk_score'])
+    disease_risk = alerts.groupby('area', observed=True)['is_alert'].sum().reset_index()
+    disease_risk['disease_risk_score'] = (disease_risk['is_alert'] * 33.33).clip(0, 100) # Max out quickly
+    return disease_risk
+
+def generate_area_risk_table(waste_df: pd.DataFrame, water_df: pd.DataFrame, disease_df: pd.DataFrame, base_path: str = "") -> pd.DataFrame:
+    """
+    Fuses risk across the three domains to create a Unified Area Risk Table.
+    """
+    # 1. Waste Risk
+    waste_risk = waste_risk_scores(waste_df)
     
-    # 2. Water Risk (Percentage of High Risk anomalies in the last 24 hours per area)
-    latest_water = water_df[water_df['timestamp'] >= water_df['timestamp'].max() - pd.Timedelta(days=1)].copy()
+    # 2. Water Risk (last 24 hours)
+    latest_water = latest_water_window(water_df)
     if len(latest_water) > 0:
-        latest_water, _ = train_leak_detection_model(latest_water)
-        latest_water['is_anomaly'] = (latest_water['leak_risk_level'] == "High Risk").astype(int)
-        water_risk = latest_water.groupby('area')['is_anomaly'].mean().reset_index()
-        water_risk['water_risk_score'] = (water_risk['is_anomaly'] * 100).clip(0, 100) # Percentage of readings that are anomalies
-    else:
-        water_risk = pd.DataFrame({'area': waste_risk['area'].unique(), 'water_risk_score': 0})
-        
-    # 3. Disease Risk (Number of alerts per area)
-    alerts = generate_disease_alerts(disease_df)
-    if len(alerts) > 0:
-        disease_risk = alerts.groupby('area')['is_alert'].sum().reset_index()
-        disease_risk['disease_risk_score'] = (disease_risk['is_alert'] * 33.33).clip(0, 100) # Max out quickly
-    else:
-        disease_risk = pd.DataFrame({'area': waste_risk['area'].unique(), 'disease_risk_score': 0})
+        latest_water = detect_leaks(latest_water, base_path=base_path)
+    water_risk = water_risk_scores(latest_water)
         
+    # 3. Disease Risk
+    disease_risk = disease_risk_scores(generate_disease_alerts(disease_df))
+    return fuse_area_risk(waste_risk, water_risk, disease_risk, base_path=base_path)
+
+def fuse_area_risk(waste_risk: pd.DataFrame, water_risk: pd.DataFrame, disease_risk: pd.DataFrame, base_path: str = "") -> pd.DataFrame:
+    """Join the per-domain area scores, apply the fusion weights and cross-domain alert rules."""
     # Merge all
     risk_table = pd.merge(pd.DataFrame({'area': waste_risk['area'].unique()}), waste_risk[['area', 'waste_risk_score']], on='area', how='left')
     risk_table = pd.merge(risk_table, water_risk[['area', 'water_risk_score']], on='area', how='left')
@@ -0,0 +1,119 @@
+import datetime
+import types
+import typing
+import numpy as np
+import pandas as pd
+
+# Smallest integer dtypes tried, in order, for fields with both a lower and upper bound
+INT_DTYPES = [np.int8, np.int16, np.int32]
+
+def unwrap_optional(annotation):
+    """Optional[X] -> (X, True); anything else -> (annotation, False)."""
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, False
+
+def field_bounds(field) -> tuple:
+    """(lower, upper) bounds from the Field's ge/gt/le/lt constraints, None when open."""
+    lower, upper = None, None
+    for meta in field.metadata:
+        if getattr(meta, "ge", None) is not None:
+            lower = meta.ge
+        if getattr(meta, "gt", None) is not None:
+            lower = meta.gt
+        if getattr(meta, "le", None) is not None:
+            upper = meta.le
+        if getattr(meta, "lt", None) is not None:
+            upper = meta.lt
+    return lower, upper
+
+def _field_extra(field) -> dict:
+    extra = field.json_schema_extra
+    return extra if isinstance(extra, dict) else {}
+
+def _int_dtype(lower, upper):
+    if lower is None or upper is None:
+        return np.int64
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lower and upper <= info.max:
+            return dtype
+    return np.int64
+
+def read_schema(model, columns=None) -> dict:
+    """
+    Derive a compact pandas read schema from a pydantic record model.
+    - str fields      -> category (unless the Field sets json_schema_extra={"unique": True})
+    - float fields    -> float32
+    - int fields      -> smallest int dtype that fits the ge/le bounds (int64 when unbounded)
+    - date/datetime   -> parsed by read_csv
+    A Field can pin its dtype explicitly with json_schema_extra={"dtype": ...}.
+    Only categoricals and dates are applied by read_csv: numeric and bool columns are read as
+    pandas infers them, so one malformed or out-of-range cell reaches validation (and quarantine)
+    instead of failing or wrapping around in the read. They are narrowed afterwards by
+    apply_final_dtypes.
+    Returns {"dtype": ..., "parse_dates": [...], "final_dtypes": {...}}.
+    """
+    dtype, parse_dates, final_dtypes = {}, [], {}
+    for name, field in model.model_fields.items():
+        if columns is not None and name not in columns:
+            continue
+        annotation, _ = unwrap_optional(field.annotation)
+        if "dtype" in _field_extra(field):
+            pinned = pd.api.types.pandas_dtype(_field_extra(field)["dtype"])
+            if pd.api.types.is_numeric_dtype(pinned) or pd.api.types.is_bool_dtype(pinned):
+                final_dtypes[name] = pinned.type
+            else:
+                dtype[name] = pinned
+        elif annotation in (datetime.datetime, datetime.date):
+            parse_dates.append(name)
+        elif annotation is str:
+            # Unique identifiers gain nothing from a categorical; leave them to read_csv
+            if not _field_extra(field).get("unique"):
+                dtype[name] = "category"
+        elif annotation is float:
+            final_dtypes[name] = np.float32
+        elif annotation is bool:
+            final_dtypes[name] = np.bool_
+        elif annotation is int:
+            final_dtypes[name] = _int_dtype(*field_bounds(field))
+    return {"dtype": dtype, "parse_dates": parse_dates, "final_dtypes": final_dtypes}
+
+def _narrowed(col: pd.Series, dtype):
+    """col cast to dtype, or None when the cast would change a value (NAs, stray strings, fractions or overflow)."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return None
+    if not (pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col)):
+        # Read as text because of a malformed cell that has since been quarantined
+        col = pd.to_numeric(col, errors="coerce")
+    if col.isna().any():
+        return None
+    dtype = np.dtype(dtype)
+    if dtype.kind != "f":
+        values = col.to_numpy(dtype="float64")
+        if dtype.kind == "b":
+            fits = np.isin(values, (0, 1)).all()
+        else:
+            info = np.iinfo(dtype)
+            fits = ((values == np.floor(values)) & (values >= info.min) & (values <= info.max)).all()
+        if not fits:
+            return None
+    return col.astype(dtype)
+
+def apply_final_dtypes(df: pd.DataFrame, final_dtypes: dict) -> pd.DataFrame:
+    """
+    Narrow numeric and bool columns to their compact dtypes. A column holding anything the
+    cast would change (NAs, stray strings, fractional or out-of-range values) is left as read,
+    so validation can quarantine the offending rows; quarantine_invalid narrows it after that.
+    """
+    casts = {}
+    for col, dt in final_dtypes.items():
+        if col in df.columns and df[col].dtype != np.dtype(dt):
+            narrowed = _narrowed(df[col], dt)
+            if narrowed is not None:
+                casts[col] = narrowed
+    if casts:
+        df = df.assign(**casts)
+    return df
@@ -0,0 +1,114 @@
+import datetime
+import os
+import numpy as np
+import pandas as pd
+
+from integration.schema import unwrap_optional, read_schema, apply_final_dtypes
+
+def _bound_checks(field):
+    """Violation checks for the ge/gt/le/lt constraints of a Field."""
+    checks = []
+    for meta in field.metadata:
+        if getattr(meta, "ge", None) is not None:
+            checks.append((f"ge {meta.ge}", lambda v, b=meta.ge: v < b))
+        if getattr(meta, "gt", None) is not None:
+            checks.append((f"gt {meta.gt}", lambda v, b=meta.gt: v <= b))
+        if getattr(meta, "le", None) is not None:
+            checks.append((f"le {meta.le}", lambda v, b=meta.le: v > b))
+        if getattr(meta, "lt", None) is not None:
+            checks.append((f"lt {meta.lt}", lambda v, b=meta.lt: v >= b))
+    return checks
+
+def _as_typed(col: pd.Series, annotation):
+    """Coerce a column to the model type; values that fail coercion become NaN/NaT."""
+    if annotation in (datetime.datetime, datetime.date):
+        if pd.api.types.is_datetime64_any_dtype(col):
+            return col
+        return pd.to_datetime(col, errors="coerce")
+    if annotation in (int, float, bool):
+        if pd.api.types.is_numeric_dtype(col) and not isinstance(col.dtype, pd.CategoricalDtype):
+            return col.astype("float64")
+        return pd.to_numeric(col, errors="coerce").astype("float64")
+    return col
+
+def compile_constraints(model) -> list:
+    """
+    Compile a pydantic record model into column-wise checks.
+    Each entry is (column, rule, required, check) where check(values) returns a boolean
+    array marking violating rows.
+    """
+    compiled = []
+    for name, field in model.model_fields.items():
+        annotation, optional = unwrap_optional(field.annotation)
+        required = field.is_required() and not optional
+        checks = []
+        if annotation is int:
+            checks.append(("type int", lambda v: np.isfinite(v) & (v != np.floor(v))))
+        elif annotation is bool:
+            checks.append(("type bool", lambda v: np.isfinite(v) & ~np.isin(v, (0, 1))))
+        if annotation in (int, float):
+            checks.extend(_bound_checks(field))
+        compiled.append((name, annotation, required, checks))
+    return compiled
+
+def validate_frame(df: pd.DataFrame, model) -> tuple:
+    """
+    Validate a whole DataFrame against a pydantic record model without building one object per row.
+    Returns (clean_mask, report) where clean_mask is a boolean array over df's rows and
+    report lists the number of violations per (column, rule).
+    """
+    n = len(df)
+    clean_mask = np.ones(n, dtype=bool)
+    report = []
+    for name, annotation, required, checks in compile_constraints(model):
+        if name not in df.columns:
+            if required:
+                clean_mask[:] = False
+                report.append({"column": name, "rule": "missing column", "violations": n})
+            continue
+
+        raw = df[name]
+        typed = _as_typed(raw, annotation)
+        missing = raw.isna().to_numpy()
+        bad_type = typed.isna().to_numpy() & ~missing
+        if required and missing.any():
+            clean_mask &= ~missing
+            report.append({"column": name, "rule": "required", "violations": int(missing.sum())})
+        if bad_type.any():
+            clean_mask &= ~bad_type
+            report.append({"column": name, "rule": f"type {annotation.__name__}", "violations": int(bad_type.sum())})
+
+        if not checks:
+            continue
+        values = typed.to_numpy(dtype="float64", na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            for rule, check in checks:
+                violated = check(values)
+                if violated.any():
+                    clean_mask &= ~violated
+                    report.append({"column": name, "rule": rule, "violations": int(violated.sum())})
+
+    return clean_mask, pd.DataFrame(report, columns=["column", "rule", "violations"])
+
+def quarantine_invalid(df: pd.DataFrame, model, name: str, base_path: str = "", append: bool = False) -> pd.DataFrame:
+    """
+    Drop rows that violate the model's constraints and write them to outputs/quarantine/<name>.csv.
+    With append (incremental refreshes) they are added to the rows quarantined earlier instead of replacing them.
+    The surviving rows are narrowed to the model's compact dtypes (see integration.schema.read_schema).
+    """
+    final_dtypes = read_schema(model, columns=df.columns)["final_dtypes"]
+    clean_mask, report = validate_frame(df, model)
+    n_bad = int((~clean_mask).sum())
+    if n_bad == 0:
+        return apply_final_dtypes(df, final_dtypes)
+
+    print(f"Quarantined {n_bad} invalid {name} rows:")
+    print(report.to_string(index=False))
+    quarantine_dir = os.path.join(base_path, "outputs/quarantine")
+    os.makedirs(quarantine_dir, exist_ok=True)
+    quarantine_path = os.path.join(quarantine_dir, f"{name}.csv")
+    if append and os.path.exists(quarantine_path):
+        df[~clean_mask].to_csv(quarantine_path, mode="a", header=False, index=False)
+    else:
+        df[~clean_mask].to_csv(quarantine_path, index=False)
+    return apply_final_dtypes(df[clean_mask], final_dtypes)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from disease.case_store import WeeklyCaseStore
+from disease.trend_alerts import aggregate_disease_data
+
+def _records(n, seed=0, offset=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "record_id": [f"REC_{offset + i:05d}" for i in range(n)],
+        "area": rng.choice(["Baner", "Kothrud", "Wakad"], n),
+        "disease": rng.choice(["Dengue", "Malaria"], n),
+        "date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 120, n), unit="D"),
+        "cases": rng.integers(1, 6, n),
+    })
+
+def _counts(frame):
+    return frame.set_index(["area", "disease", "week_start"])["cases"].sort_index()
+
+def test_complete_merge_retracts_records_gone_from_a_shrunk_or_rewritten_file(tmp_path):
+    store = WeeklyCaseStore(str(tmp_path))
+    store.merge(_records(3000), complete=True)
+
+    # The raw file is cut to its first 1000 rows, then rewritten with other records and a correction
+    shrunk = _records(3000).iloc[:1000]
+    summary = WeeklyCaseStore(str(tmp_path)).merge(shrunk, complete=True)
+    assert summary["retracted"] == 2000 and summary["unchanged"] == 1000
+    rewritten = pd.concat([shrunk.iloc[:500].assign(cases=lambda d: d["cases"] + 1), _records(800, seed=1, offset=5000)])
+    store = WeeklyCaseStore(str(tmp_path))
+    store.merge(rewritten, complete=True)
+
+    expected = _counts(aggregate_disease_data(rewritten))
+    assert store.weekly()["cases"].sum() == rewritten["cases"].sum()
+    pd.testing.assert_series_equal(_counts(store.weekly()), expected, check_dtype=False, check_index_type=False)
+
+def test_partial_merge_keeps_earlier_records(tmp_path):
+    store = WeeklyCaseStore(str(tmp_path))
+    store.merge(_records(300))
+    summary = store.merge(_records(100, seed=2, offset=300))
+    assert summary["retracted"] == 0
+    assert store.weekly()["cases"].sum() == _records(300)["cases"].sum() + _records(100, seed=2)["cases"].sum()
@@ -0,0 +1,44 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from waste.contraction import ContractionHierarchy
+
+def _grid(side=12, seed=0):
+    """Undirected grid road graph with random segment lengths and a few segments removed."""
+    rng = np.random.default_rng(seed)
+    node = np.arange(side * side).reshape(side, side)
+    sources = np.r_[node[:, :-1].ravel(), node[:-1, :].ravel()]
+    targets = np.r_[node[:, 1:].ravel(), node[1:, :].ravel()]
+    keep = rng.random(len(sources)) > 0.1
+    weights = rng.uniform(0.1, 2.0, keep.sum())
+    return side * side, sources[keep], targets[keep], weights
+
+def _reference(n, sources, targets, weights):
+    graph = coo_matrix((weights, (sources, targets)), shape=(n, n)).tocsr()
+    return dijkstra(graph, directed=False)
+
+def test_distance_table_matches_dijkstra():
+    n, sources, targets, weights = _grid()
+    ch = ContractionHierarchy.build(n, sources, targets, weights)
+    expected = _reference(n, sources, targets, weights)
+    rows, cols = np.arange(0, n, 7), np.arange(3, n, 5)
+    assert np.allclose(ch.distance_table(rows, cols), expected[np.ix_(rows, cols)])
+
+def test_path_unpacks_to_original_segments():
+    n, sources, targets, weights = _grid(seed=1)
+    ch = ContractionHierarchy.build(n, sources, targets, weights)
+    expected = _reference(n, sources, targets, weights)
+    length = {}
+    for a, b, w in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+        length[(a, b)] = length[(b, a)] = w
+    rng = np.random.default_rng(2)
+    for s, t in rng.integers(0, n, size=(25, 2)):
+        distance, nodes = ch.path(int(s), int(t))
+        if np.isinf(expected[s, t]):
+            assert np.isinf(distance) and nodes == []
+            continue
+        assert np.isclose(distance, expected[s, t])
+        assert nodes[0] == s and nodes[-1] == t
+        # Every hop is a real road segment and the segments add up to the distance
+        assert np.isclose(sum(length[(a, b)] for a, b in zip(nodes, nodes[1:])), expected[s, t])
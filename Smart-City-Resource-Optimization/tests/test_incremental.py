@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from integration.incremental import Watermark, read_delta
+from waste.models import WasteRecord
+
+def _waste_rows(n, start="2024-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "bin_id": [f"BIN_{i:05d}" for i in range(n)],
+        "area": rng.choice(["Baner", "Kothrud", "Wakad"], n),
+        "fill_percentage": rng.uniform(0, 100, n).round(2),
+        "overflow_risk": rng.integers(0, 2, n),
+        "population_density": rng.uniform(1000, 20000, n).round(1),
+        "timestamp": pd.date_range(start, periods=n, freq="min"),
+    })
+
+def test_append_reads_only_new_rows(tmp_path):
+    path = tmp_path / "waste.csv"
+    rows = _waste_rows(3000)
+    rows.iloc[:2000].to_csv(path, index=False)
+    watermark = Watermark()
+    first, _ = read_delta(str(path), watermark, "timestamp", WasteRecord)
+    rows.iloc[2000:].to_csv(path, mode="a", header=False, index=False)
+    second, was_reset = read_delta(str(path), watermark, "timestamp", WasteRecord)
+    assert len(first) == 2000 and len(second) == 1000 and not was_reset
+
+def test_rewrite_at_larger_size_resets(tmp_path):
+    path = tmp_path / "waste.csv"
+    rows = _waste_rows(3000)
+    rows.to_csv(path, index=False)
+    watermark = Watermark()
+    read_delta(str(path), watermark, "timestamp", WasteRecord)
+
+    # Same header, same bytes reordered, plus appended rows: the old offset now lands mid-line
+    extra = _waste_rows(500, start="2024-02-01", seed=1)
+    pd.concat([rows.sample(frac=1, random_state=0), extra]).to_csv(path, index=False)
+    delta, was_reset = read_delta(str(path), watermark, "timestamp", WasteRecord)
+    assert was_reset
+    assert len(delta) == 3500
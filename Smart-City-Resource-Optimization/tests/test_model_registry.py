@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from integration.model_registry import ModelRegistry
+
+def test_register_prunes_old_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep=3)
+    for i in range(8):
+        registry.register({"fit": i}, {"rows": i})
+    assert registry.versions() == [6, 7, 8]
+    model, metadata = registry.load_current()
+    assert model == {"fit": 7} and metadata["version"] == 8
+
+def test_concurrent_registers_get_distinct_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep=100)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        stored = list(pool.map(lambda i: registry.register({"fit": i}, {"rows": i}), range(32)))
+    assert sorted(m["version"] for m in stored) == list(range(1, 33))
+    for metadata in stored:
+        assert registry.load(metadata["version"]) == {"fit": metadata["rows"]}
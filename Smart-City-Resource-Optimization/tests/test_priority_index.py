@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from waste.priority_index import BinPriorityIndex, ABOVE_SCAN_CUTOFF
+from waste.routing import calculate_bin_priority, get_high_priority_bins
+
+def _bins(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "bin_id": [f"BIN_{i:05d}" for i in range(n)],
+        "area": rng.choice(["Baner", "Kothrud", "Wakad"], n),
+        "fill_percentage": rng.uniform(0, 100, n),
+        "overflow_risk": rng.integers(0, 2, n).astype(np.int8),
+        "population_density": rng.uniform(1000, 20000, n),
+    })
+
+def _randomly_updated(n=3000, n_updates=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    index = BinPriorityIndex(_bins(n, seed))
+    for step in range(n_updates):
+        if step % 10 == 0:
+            # New bins force the slot arrays to grow several times
+            index.update(f"NEW_{step:05d}", area="Baner", fill_percentage=float(rng.uniform(0, 100)),
+                         overflow_risk=int(rng.integers(0, 2)), population_density=float(rng.uniform(1000, 20000)))
+        elif step % 3 == 0:
+            index.report_overflow(f"BIN_{rng.integers(n):05d}")
+        else:
+            index.update(f"BIN_{rng.integers(n):05d}", fill_percentage=float(rng.uniform(0, 100)))
+    return index
+
+def test_top_k_and_above_match_full_recompute():
+    index = _randomly_updated()
+    expected = calculate_bin_priority(index.bins.drop(columns=["fill_score", "population_weight", "priority"]))
+    assert len(index) == len(expected) == 3200
+
+    top = index.top_k(50)
+    assert np.allclose(index.frame(top)["priority"], expected["priority"].head(50))
+    # Both the heap walk and the scan past ABOVE_SCAN_CUTOFF results
+    for threshold in [expected["priority"].iloc[20], expected["priority"].iloc[ABOVE_SCAN_CUTOFF + 100], 12.0]:
+        high = get_high_priority_bins(expected, threshold)
+        found = index.above(threshold)
+        assert sorted(found) == sorted(high["bin_id"])
+        assert np.all(np.diff(index.frame(found)["priority"]) <= 0)
+
+def test_high_priority_frame_keeps_dtypes():
+    index = _randomly_updated(n=500, n_updates=400)
+    frame = index.high_priority_frame()
+    assert frame["overflow_risk"].dtype == np.int8
+    assert frame["fill_percentage"].dtype == np.float64
+    assert (frame["priority"] >= 12.0).all()
+    assert index.frame(["NEW_00000"])["bin_id"].tolist() == ["NEW_00000"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from waste.route_repair import RoutePlan
+from waste.vrp import route_fleet
+
+AREAS = ["Baner", "Kothrud", "Wakad", "Viman Nagar"]
+
+def _bins(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "bin_id": [f"BIN_{i:03d}" for i in range(n)],
+        "area": rng.choice(AREAS, n),
+        "latitude": 18.52 + rng.uniform(-0.05, 0.05, n),
+        "longitude": 73.85 + rng.uniform(-0.05, 0.05, n),
+        "priority": rng.uniform(0, 20, n),
+    })
+
+def _urgent(n, seed=1):
+    bins = _bins(n, seed)
+    return bins.assign(bin_id=[f"URGENT_{i:02d}" for i in range(n)])
+
+def test_from_fleet_reads_exact_capacity(tmp_path):
+    # 1/300 and 7/150 round to load percentages that do not map back to the capacity
+    for capacity, n_bins in [(300, 1), (150, 7)]:
+        bins = _bins(n_bins)
+        fleet, _ = route_fleet(bins, num_trucks=1, truck_capacity=capacity, time_budget=0.1, base_path=str(tmp_path))
+        plan = RoutePlan.from_fleet(fleet, bins)
+        assert plan.capacities == [capacity]
+
+def test_insert_urgent_respects_capacity_and_served_stops():
+    bins = _bins(40)
+    routes = [bins["bin_id"].iloc[i * 10:(i + 1) * 10].tolist() for i in range(4)]
+    capacities = [10, 12, 10, 13]
+    served = [4, 6, 0, 9]
+    plan = RoutePlan(bins, routes, capacities, served=served)
+    before = [list(r) for r in plan.routes]
+
+    diff = plan.insert_urgent(_urgent(8), max_repair_moves=50)
+    # Only 2 + 3 slots are free, so 5 bins go in and 3 are left over
+    assert len(diff["inserted"]) == 5 and len(diff["unassigned"]) == 3
+    assert {placed["truck"] for placed in diff["inserted"]} <= {1, 3}
+    for t, route in enumerate(plan.routes):
+        assert len(route) <= capacities[t]
+        # Stops already served stay where they were
+        assert route[:served[t]] == before[t][:served[t]]
+    for placed in diff["inserted"]:
+        assert placed["position"] >= served[placed["truck"]]
+
+def test_insert_urgent_skips_planned_bins_and_uses_area_distances():
+    bins = _bins(12).drop(columns=["latitude", "longitude"])
+    plan = RoutePlan.from_fleet({"route": ["Depot"] + AREAS + ["Depot"], "truck_capacity": 15,
+                                 "truck_load_percentage": 80.0, "bins_collected": 12,
+                                 "selected_bin_ids": bins["bin_id"].tolist()}, bins)
+    assert plan.by_area
+    diff = plan.insert_urgent(pd.DataFrame([{"bin_id": "BIN_003", "area": "Baner"},
+                                            {"bin_id": "URGENT", "area": AREAS[0]}]))
+    assert diff["already_planned"] == ["BIN_003"]
+    # Another bin in an area the truck already visits adds no distance on area-level routing
+    assert diff["inserted"][0]["added_km"] == 0.0
+    assert plan.to_fleet()[0]["truck_capacity"] == 15
@@ -0,0 +1,38 @@
+import time
+import numpy as np
+import pandas as pd
+
+from waste.vrp import AreaDistances, solve_cvrp, route_fleet
+
+def _area_instance(n_bins, n_areas=8, seed=0):
+    rng = np.random.default_rng(seed)
+    area_matrix = rng.uniform(1, 15, size=(n_areas + 1, n_areas + 1))
+    area_matrix = (area_matrix + area_matrix.T) / 2
+    np.fill_diagonal(area_matrix, 0)
+    node_area = np.r_[0, rng.integers(1, n_areas + 1, n_bins)]
+    return AreaDistances(area_matrix, node_area)
+
+def test_area_level_solve_stays_within_budget():
+    n_bins, capacity, budget = 6000, 20, 1.0
+    dist = _area_instance(n_bins)
+    demands = np.r_[0, np.ones(n_bins)]
+    start = time.perf_counter()
+    solution = solve_cvrp(dist, demands, n_bins // capacity, capacity, time_budget=budget)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < budget * 1.5 + 0.5
+    served = np.concatenate([np.asarray(r) for r in solution["routes"]] + [np.asarray(solution["unassigned"], dtype=int)])
+    assert sorted(served.tolist()) == list(range(1, n_bins + 1))
+    assert max(len(r) for r in solution["routes"]) <= capacity
+    assert len(solution["routes"]) <= n_bins // capacity
+
+def test_route_fleet_reports_bins_beyond_capacity(tmp_path):
+    bins = pd.DataFrame({
+        "bin_id": [f"BIN_{i:03d}" for i in range(30)],
+        "area": np.tile(["Baner", "Kothrud", "Wakad"], 10),
+        "priority": np.arange(30, 0, -1, dtype=float),
+    })
+    fleet, unassigned = route_fleet(bins, num_trucks=2, truck_capacity=10, time_budget=0.2, base_path=str(tmp_path))
+    assert sum(t["bins_collected"] for t in fleet) == 20
+    # The lowest-priority bins are the ones left over
+    assert sorted(unassigned) == [f"BIN_{i:03d}" for i in range(20, 30)]
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from waste.routing import calculate_bin_priority, get_high_priority_bins
+from waste.dijkstra import route_dijkstra
+from waste.spatial import DEPOT_COORDS
+from waste.vrp import route_fleet
+
+RESULTS_PATH = "outputs/reports/routing_benchmark.json"
+BASELINE_PATH = "outputs/reports/routing_benchmark_baseline.json"
+
+# (bins, areas, with coordinates) grid; QUICK_INSTANCES keeps a run to a couple of minutes.
+# Instances without coordinates take the area-level routing the committed data uses.
+INSTANCES = [(1_000, 8, True), (1_000, 8, False), (10_000, 8, True), (10_000, 50, True), (10_000, 50, False),
+             (100_000, 50, True), (100_000, 500, True), (1_000_000, 500, True)]
+QUICK_INSTANCES = [(1_000, 8, True), (10_000, 50, True), (10_000, 50, False), (100_000, 500, True)]
+
+# A metric regresses when it is worse than the baseline by more than (fraction, absolute amount);
+# the absolute floor keeps millisecond-level timer noise from being flagged
+TOLERANCES = {"wall_time_s": (0.25, 0.05), "peak_mem_mb": (0.25, 1.0), "total_distance_km": (0.01, 0.0)}
+# Time-budgeted solvers run until their budget, so their wall time is the budget and their distance
+# depends on how many improvement moves the machine fits in: distance gets a wider band
+BUDGETED_TOLERANCES = {"wall_time_s": (0.25, 0.5), "peak_mem_mb": (0.25, 1.0), "total_distance_km": (0.05, 0.0)}
+
+def make_instance(num_bins: int, num_areas: int, seed: int = 42, coordinates: bool = True) -> pd.DataFrame:
+    """
+    Seeded synthetic city: area centroids scattered around the depot, bins within ~1 km of theirs.
+    Without coordinates the bins only carry their area, like the committed dataset.
+    """
+    rng = np.random.default_rng(seed + num_bins * 1000 + num_areas)
+    centroids = np.column_stack([
+        DEPOT_COORDS[0] + rng.uniform(-0.09, 0.09, num_areas),
+        DEPOT_COORDS[1] + rng.uniform(-0.09, 0.09, num_areas),
+    ])
+    area = rng.integers(0, num_areas, num_bins)
+    radius = np.sqrt(rng.uniform(0, 1, num_bins)) / 111.0
+    angle = rng.uniform(0, 2 * np.pi, num_bins)
+    df = pd.DataFrame({
+        "bin_id": [f"BIN_{i:07d}" for i in range(num_bins)],
+        "area": pd.Categorical([f"Area_{a:03d}" for a in area]),
+        "fill_percentage": rng.uniform(0, 100, num_bins),
+        "overflow_risk": (rng.random(num_bins) < 0.2).astype(np.int8),
+        "population_density": rng.uniform(5000, 20000, num_bins),
+        "latitude": centroids[area, 0] + radius * np.sin(angle),
+        "longitude": centroids[area, 1] + radius * np.cos(angle) / np.cos(np.radians(centroids[area, 0])),
+    })
+    return df if coordinates else df.drop(columns=["latitude", "longitude"])
+
+def measure(fn, *args, **kwargs) -> tuple:
+    """(result, wall seconds, peak traced MB). Time and memory come from separate runs so tracing does not skew timing."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    wall = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, wall, peak / 2**20
+
+def dijkstra_fleet_distance(bins: pd.DataFrame, truck_capacity: int, base_path: str = "") -> float:
+    """
+    Baseline: the original single-truck route_dijkstra run once per truck_capacity bins, in priority order.
+    With coordinates that is its nearest-neighbour tour over bin positions, without it the area-level tour.
+    """
+    return sum(route_dijkstra(bins.iloc[s:s + truck_capacity], truck_capacity=truck_capacity, base_path=base_path)["total_distance_km"]
+               for s in range(0, len(bins), truck_capacity))
+
+def run_instance(num_bins: int, num_areas: int, coordinates: bool = True, truck_capacity: int = 20,
+                 max_routed_bins: int = 2000, time_budget: float = 2.0, seed: int = 42) -> list:
+    """Benchmark every routing step on one instance; returns one result row per step."""
+    name = f"{num_bins}bins_{num_areas}areas" + ("" if coordinates else "_nocoords")
+    df = make_instance(num_bins, num_areas, seed, coordinates=coordinates)
+    rows = []
+
+    prio, wall, mem = measure(calculate_bin_priority, df.copy())
+    rows.append({"instance": name, "step": "calculate_bin_priority", "wall_time_s": wall, "peak_mem_mb": mem})
+    high, wall, mem = measure(get_high_priority_bins, prio)
+    rows.append({"instance": name, "step": "get_high_priority_bins", "wall_time_s": wall, "peak_mem_mb": mem})
+
+    # Route the most urgent bins a fleet can take in one shift
+    routed = high.head(max_routed_bins)
+    num_trucks = int(np.ceil(len(routed) / truck_capacity))
+    # The routers write their JSON outputs; keep benchmark routes out of outputs/optimized_routes
+    scratch = tempfile.mkdtemp(prefix="routing_benchmark_")
+    try:
+        single, wall, mem = measure(route_dijkstra, routed, truck_capacity=truck_capacity, base_path=scratch)
+        rows.append({"instance": name, "step": "route_dijkstra", "wall_time_s": wall, "peak_mem_mb": mem,
+                     "total_distance_km": single["total_distance_km"], "utilisation_pct": single["truck_load_percentage"]})
+
+        baseline_km, wall, mem = measure(dijkstra_fleet_distance, routed, truck_capacity, base_path=scratch)
+        rows.append({"instance": name, "step": "route_dijkstra_fleet_baseline", "wall_time_s": wall, "peak_mem_mb": mem,
+                     "total_distance_km": round(baseline_km, 2), "trucks": num_trucks,
+                     "utilisation_pct": round(len(routed) / (num_trucks * truck_capacity) * 100, 1)})
+
+        (fleet, _), wall, mem = measure(route_fleet, routed, num_trucks=num_trucks, truck_capacity=truck_capacity,
+                                        time_budget=time_budget, base_path=scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    fleet_km = sum(t["total_distance_km"] for t in fleet)
+    rows.append({"instance": name, "step": "route_fleet", "wall_time_s": wall, "peak_mem_mb": mem,
+                 "total_distance_km": round(fleet_km, 2), "trucks": len(fleet), "time_budget_s": time_budget,
+                 "utilisation_pct": round(float(np.mean([t["truck_load_percentage"] for t in fleet])), 1),
+                 "vs_baseline_pct": round((fleet_km / baseline_km - 1) * 100, 2) if baseline_km else None})
+    return rows
+
+def find_regressions(results: list, baseline: list, tolerances: dict = TOLERANCES,
+                     budgeted_tolerances: dict = BUDGETED_TOLERANCES) -> list:
+    """Metrics worse than the stored baseline by more than their tolerance (budgeted_tolerances for time-budgeted steps)."""
+    reference = {(r["instance"], r["step"]): r for r in baseline}
+    regressions = []
+    for row in results:
+        base = reference.get((row["instance"], row["step"]))
+        if base is None:
+            continue
+        step_tolerances = budgeted_tolerances if row.get("time_budget_s") else tolerances
+        for metric, (relative, absolute) in step_tolerances.items():
+            if row.get(metric) is None or base.get(metric) is None:
+                continue
+            if row[metric] > base[metric] * (1 + relative) and row[metric] - base[metric] > absolute:
+                regressions.append({"instance": row["instance"], "step": row["step"], "metric": metric,
+                                    "baseline": base[metric], "current": row[metric]})
+    return regressions
+
+def run_benchmark(instances: list = INSTANCES, base_path: str = "", results_path: str = RESULTS_PATH,
+                  baseline_path: str = BASELINE_PATH, update_baseline: bool = False, **kwargs) -> dict:
+    results = []
+    for num_bins, num_areas, coordinates in instances:
+        rows = run_instance(num_bins, num_areas, coordinates, **kwargs)
+        for row in rows:
+            print(f"{row['instance']:>26} {row['step']:>29}: {row['wall_time_s']:8.3f}s {row['peak_mem_mb']:9.1f} MB"
+                  + (f" {row['total_distance_km']:10.1f} km" if "total_distance_km" in row else ""))
+        results.extend(rows)
+
+    full_baseline_path = os.path.join(base_path, baseline_path)
+    baseline = []
+    if os.path.exists(full_baseline_path):
+        with open(full_baseline_path, "r") as f:
+            baseline = json.load(f)["results"]
+    report = {
+        "meta": {
+            "timestamp": pd.Timestamp.now().isoformat(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+        "regressions": find_regressions(results, baseline),
+    }
+
+    full_results_path = os.path.join(base_path, results_path)
+    os.makedirs(os.path.dirname(full_results_path), exist_ok=True)
+    with open(full_results_path, "w") as f:
+        json.dump(report, f, indent=2)
+    if update_baseline:
+        with open(full_baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Routing benchmark: speed, memory and route quality on seeded instances.")
+    parser.add_argument("--quick", action="store_true", help="Only run the smaller instances")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="Improvement time budget per route_fleet call")
+    parser.add_argument("--max-routed-bins", type=int, default=2000, help="Most urgent bins routed per instance")
+    args = parser.parse_args()
+
+    report = run_benchmark(QUICK_INSTANCES if args.quick else INSTANCES, update_baseline=args.update_baseline,
+                           time_budget=args.time_budget, max_routed_bins=args.max_routed_bins)
+    for r in report["regressions"]:
+        print(f"REGRESSION {r['instance']} {r['step']} {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f}")
+    sys.exit(1 if report["regressions"] else 0)
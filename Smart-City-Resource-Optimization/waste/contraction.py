@@ -0,0 +1,238 @@
+import heapq
+import numpy as np
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy over an undirected road graph with nodes 0..n-1.
+    Preprocessing contracts nodes in order of importance, adding shortcut edges that preserve
+    shortest-path distances. Queries then only relax edges towards higher-ranked nodes, so a
+    point-to-point search settles a few hundred nodes even on city-sized graphs.
+    The hierarchy is stored as a CSR upward graph: indptr/targets/weights plus the contracted
+    middle node of each shortcut (-1 for an original road segment), used to unpack paths.
+    """
+    def __init__(self, rank, indptr, targets, weights, middle):
+        self.rank = np.asarray(rank, dtype=np.int32)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.middle = np.asarray(middle, dtype=np.int32)
+        # Plain lists for the query loops: indexing them is much cheaper than numpy scalars
+        self._indptr = self.indptr.tolist()
+        self._targets = self.targets.tolist()
+        self._weights = self.weights.tolist()
+
+    def __len__(self):
+        return len(self.rank)
+
+    @classmethod
+    def build(cls, num_nodes: int, sources, targets, weights, settle_limit: int = 60) -> "ContractionHierarchy":
+        """
+        Contract every node, cheapest first (edge difference + contracted neighbours, lazily updated).
+        settle_limit bounds each witness search; a missed witness only adds a redundant shortcut.
+        """
+        adj = [dict() for _ in range(num_nodes)]
+        for a, b, w in zip(np.asarray(sources).tolist(), np.asarray(targets).tolist(), np.asarray(weights, dtype=float).tolist()):
+            if a != b and w < adj[a].get(b, np.inf):
+                adj[a][b] = w
+                adj[b][a] = w
+        middle_of = {}
+        contracted = np.zeros(num_nodes, dtype=bool)
+        contracted_neighbors = [0] * num_nodes
+
+        def witness_distances(source, skip, max_dist):
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            settled = 0
+            while heap and settled < settle_limit:
+                d, x = heapq.heappop(heap)
+                if d > max_dist:
+                    break
+                if d > dist[x]:
+                    continue
+                settled += 1
+                for y, w in adj[x].items():
+                    nd = d + w
+                    if y != skip and nd < dist.get(y, np.inf):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+            return dist
+
+        def shortcuts_needed(v):
+            neighbors = list(adj[v].items())
+            shortcuts = []
+            for i, (a, wa) in enumerate(neighbors):
+                if i + 1 == len(neighbors):
+                    break
+                max_dist = wa + max(wb for _, wb in neighbors[i + 1:])
+                dist = witness_distances(a, v, max_dist)
+                for b, wb in neighbors[i + 1:]:
+                    if dist.get(b, np.inf) > wa + wb:
+                        shortcuts.append((a, b, wa + wb))
+            return shortcuts
+
+        def priority(v):
+            return len(shortcuts_needed(v)) - len(adj[v]) + contracted_neighbors[v]
+
+        heap = [(priority(v), v) for v in range(num_nodes)]
+        heapq.heapify(heap)
+        rank = np.zeros(num_nodes, dtype=np.int32)
+        up_edges = [None] * num_nodes
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # Lazy update: re-evaluate and put back if it is no longer the cheapest
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            up_edges[v] = [(u, w, middle_of.get((min(u, v), max(u, v)), -1)) for u, w in adj[v].items()]
+            for a, b, w in shortcuts_needed(v):
+                if w < adj[a].get(b, np.inf):
+                    adj[a][b] = w
+                    adj[b][a] = w
+                    middle_of[(min(a, b), max(a, b))] = v
+            for u in adj[v]:
+                del adj[u][v]
+                contracted_neighbors[u] += 1
+            adj[v] = {}
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+
+        degree = np.array([len(e) for e in up_edges], dtype=np.int64)
+        indptr = np.r_[0, np.cumsum(degree)]
+        flat = [edge for edges in up_edges for edge in edges]
+        return cls(
+            rank,
+            indptr,
+            [e[0] for e in flat],
+            [e[1] for e in flat],
+            [e[2] for e in flat],
+        )
+
+    def _upward_search(self, source: int) -> tuple:
+        """Distances and parents of every node reachable from source via upward edges."""
+        indptr, targets, weights = self._indptr, self._targets, self._weights
+        dist = {source: 0.0}
+        parent = {source: -1}
+        heap = [(0.0, source)]
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            for e in range(indptr[x], indptr[x + 1]):
+                y = targets[e]
+                nd = d + weights[e]
+                if nd < dist.get(y, np.inf):
+                    dist[y] = nd
+                    parent[y] = x
+                    heapq.heappush(heap, (nd, y))
+        return dist, parent
+
+    def _meet(self, source: int, target: int) -> tuple:
+        """(distance, meeting node, forward parents, backward parents) of a bidirectional upward search."""
+        if source == target:
+            return 0.0, source, {source: -1}, {target: -1}
+        indptr, targets, weights = self._indptr, self._targets, self._weights
+        dist = ({source: 0.0}, {target: 0.0})
+        parent = ({source: -1}, {target: -1})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, meet = np.inf, -1
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                if heap[0][0] >= best:
+                    heap.clear()
+                    continue
+                d, x = heapq.heappop(heap)
+                if d > dist[side][x]:
+                    continue
+                other = dist[1 - side].get(x)
+                if other is not None and d + other < best:
+                    best, meet = d + other, x
+                for e in range(indptr[x], indptr[x + 1]):
+                    y = targets[e]
+                    nd = d + weights[e]
+                    if nd < dist[side].get(y, np.inf):
+                        dist[side][y] = nd
+                        parent[side][y] = x
+                        heapq.heappush(heap, (nd, y))
+        return best, meet, parent[0], parent[1]
+
+    def distance(self, source: int, target: int) -> float:
+        """Shortest-path distance between two nodes (inf if disconnected)."""
+        return float(self._meet(source, target)[0])
+
+    def _edge_middle(self, a: int, b: int) -> int:
+        low, high = (a, b) if self.rank[a] < self.rank[b] else (b, a)
+        start, end = self._indptr[low], self._indptr[low + 1]
+        hits = np.flatnonzero(self.targets[start:end] == high)
+        # Parallel entries can only differ by weight; the lightest one is the one searches use
+        e = start + hits[np.argmin(self.weights[start + hits])]
+        return int(self.middle[e])
+
+    def _unpack(self, a: int, b: int) -> list:
+        """Original-graph node sequence for the (possibly shortcut) edge a -> b, without a."""
+        out = []
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            m = self._edge_middle(x, y)
+            if m < 0:
+                out.append(y)
+            else:
+                stack.append((m, y))
+                stack.append((x, m))
+        return out
+
+    def path(self, source: int, target: int) -> tuple:
+        """(distance, node list from source to target); (inf, []) if disconnected."""
+        best, meet, forward, backward = self._meet(source, target)
+        if meet < 0:
+            return np.inf, []
+        up = [meet]
+        while forward[up[-1]] >= 0:
+            up.append(forward[up[-1]])
+        down = [meet]
+        while backward[down[-1]] >= 0:
+            down.append(backward[down[-1]])
+        chain = up[::-1] + down[1:]
+        nodes = [chain[0]]
+        for a, b in zip(chain, chain[1:]):
+            nodes.extend(self._unpack(a, b))
+        return float(best), nodes
+
+    def distance_table(self, sources, targets) -> np.ndarray:
+        """
+        Many-to-many distances with bucket scans: one upward search per target fills buckets,
+        one upward search per source reads them. Cost is |sources| + |targets| searches, not their product.
+        """
+        sources = np.asarray(sources, dtype=np.int64).tolist()
+        targets = np.asarray(targets, dtype=np.int64).tolist()
+        buckets = {}
+        for j, t in enumerate(targets):
+            dist, _ = self._upward_search(t)
+            for x, d in dist.items():
+                buckets.setdefault(x, []).append((j, d))
+        table = np.full((len(sources), len(targets)), np.inf)
+        for i, s in enumerate(sources):
+            dist, _ = self._upward_search(s)
+            row = table[i]
+            for x, d in dist.items():
+                for j, dt in buckets.get(x, ()):
+                    if d + dt < row[j]:
+                        row[j] = d + dt
+        return table
+
+    def save(self, path: str):
+        np.savez(path, rank=self.rank, indptr=self.indptr, targets=self.targets, weights=self.weights, middle=self.middle)
+
+    @classmethod
+    def load(cls, path: str) -> "ContractionHierarchy":
+        with np.load(path) as data:
+            return cls(data["rank"], data["indptr"], data["targets"], data["weights"], data["middle"])
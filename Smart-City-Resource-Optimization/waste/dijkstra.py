@@ -1,58 +1,100 @@
 import pandas as pd
-import networkx as nx
 import numpy as np
+import hashlib
 import json
 import os
 
+from waste.spatial import has_bin_coordinates, haversine_km, NearestUnvisited, DEPOT_COORDS
+
+def _synthetic_km(a, b) -> float:
+    """Stand-in distance between 1 and 15 km, fixed by the (unordered) pair of names."""
+    digest = hashlib.sha1("|".join(sorted((str(a), str(b)))).encode("utf-8")).digest()
+    return 1 + 14 * int.from_bytes(digest[:8], "little") / 2 ** 64
+
 def create_synthetic_distance_matrix(locations: list) -> pd.DataFrame:
-    """Creates a simulated distance matrix for a list of locations."""
-    n = len(locations)
-    # Generate symmetric random distances between 1 and 15 km
-    dist = np.random.uniform(1, 15, size=(n, n))
-    dist = (dist + dist.T) / 2
-    np.fill_diagonal(dist, 0)
-    
+    """
+    Creates a simulated distance matrix for a list of locations.
+    Distances are derived from the location names, so every call (and any subset of the
+    same locations) sees the same symmetric matrix and routes are reproducible.
+    """
+    dist = np.array([[0.0 if a == b else _synthetic_km(a, b) for b in locations] for a in locations])
     return pd.DataFrame(dist, index=locations, columns=locations)
 
-def route_dijkstra(prioritized_bins: pd.DataFrame, truck_capacity: int = 20) -> dict:
+def area_distance_matrix(areas: list, road_network=None) -> np.ndarray:
+    """Area-to-area distances as a dense array: shortest road distances when a RoadNetwork is given, else synthetic."""
+    if road_network is not None:
+        return road_network.submatrix(areas)
+    return create_synthetic_distance_matrix(areas).to_numpy()
+
+def route_bins_greedy(selected_bins: pd.DataFrame) -> tuple:
+    """
+    Nearest-neighbour tour over real bin positions, starting and ending at the depot.
+    Nearest-unvisited lookups go through a ball tree, so each step is logarithmic in the number of bins.
+    Returns (ordered bin rows, total distance in km).
+    """
+    lat = selected_bins['latitude'].to_numpy(dtype=float)
+    lon = selected_bins['longitude'].to_numpy(dtype=float)
+    lookup = NearestUnvisited(lat, lon)
+    order = []
+    current = DEPOT_COORDS
+    total_distance = 0.0
+    while lookup.remaining():
+        nxt = lookup.nearest(*current)
+        total_distance += float(haversine_km(current[0], current[1], lat[nxt], lon[nxt]))
+        lookup.visit(nxt)
+        order.append(nxt)
+        current = (lat[nxt], lon[nxt])
+    total_distance += float(haversine_km(current[0], current[1], *DEPOT_COORDS))
+    return selected_bins.iloc[order], total_distance
+
+def route_dijkstra(prioritized_bins: pd.DataFrame, truck_capacity: int = 20, road_network=None, base_path: str = "") -> dict:
     """
     Simulates a routing approach to visit high priority bins.
     For the hackathon, we simply cluster by area, pick the top N within capacity.
     Nodes -> areas
-    Edges -> distances
+    Edges -> distances (precomputed road distances from road_network when available)
+    When bins carry latitude/longitude the tour is planned over actual bin positions instead.
+    The route is written to outputs/optimized_routes/waste_routes.json under base_path.
     """
+    if has_bin_coordinates(prioritized_bins):
+        selected_bins, total_distance = route_bins_greedy(prioritized_bins.head(truck_capacity))
+        route = ["Depot"]
+        for area in selected_bins['area'].astype(str):
+            if area != route[-1]:
+                route.append(area)
+        route.append("Depot")
+        return _save_route(route, total_distance, selected_bins, truck_capacity, base_path=base_path)
+
     areas = ["Depot"] + prioritized_bins['area'].unique().tolist()
-    dist_matrix = create_synthetic_distance_matrix(areas)
-    
-    G = nx.Graph()
-    for i, area in enumerate(areas):
-        for j, target in enumerate(areas):
-            if i < j:
-                G.add_edge(area, target, weight=dist_matrix.loc[area, target])
+    dist_matrix = area_distance_matrix(areas, road_network)
                 
     # Select bins up to truck capacity
     selected_bins = prioritized_bins.head(truck_capacity)
-    visited_areas = selected_bins['area'].unique().tolist()
+    area_index = {area: i for i, area in enumerate(areas)}
+    unvisited = np.array([area_index[a] for a in selected_bins['area'].unique()], dtype=np.int64)
     
     # Build a simple route from Depot -> visiting all visited_areas using a greedy nearest neighbor
     route = ["Depot"]
-    current_node = "Depot"
-    unvisited = set(visited_areas)
-    
+    current = 0
     total_distance = 0
-    while unvisited:
+    while len(unvisited):
         # Find nearest neighbor
-        distances = {node: G[current_node][node]['weight'] for node in unvisited}
-        next_node = min(distances, key=distances.get)
-        total_distance += distances[next_node]
-        route.append(next_node)
-        current_node = next_node
-        unvisited.remove(next_node)
+        k = int(np.argmin(dist_matrix[current, unvisited]))
+        next_node = unvisited[k]
+        total_distance += float(dist_matrix[current, next_node])
+        route.append(areas[next_node])
+        current = next_node
+        unvisited = np.delete(unvisited, k)
         
     # Return to depot
-    total_distance += G[current_node]["Depot"]['weight']
+    total_distance += float(dist_matrix[current, 0])
     route.append("Depot")
+    road_path = road_network.expand_route(route) if road_network is not None else None
     
+    return _save_route(route, total_distance, selected_bins, truck_capacity, road_path=road_path, base_path=base_path)
+
+def _save_route(route: list, total_distance: float, selected_bins: pd.DataFrame, truck_capacity: int, road_path: list = None,
+                base_path: str = "") -> dict:
     # Calculate load percentage
     load_percentage = (len(selected_bins) / truck_capacity) * 100
     
@@ -61,11 +103,15 @@ def route_dijkstra(prioritized_bins: pd.DataFrame, truck_capacity: int = 20) ->
         "total_distance_km": round(total_distance, 2),
         "bins_collected": len(selected_bins),
         "truck_load_percentage": round(load_percentage, 1),
-        "selected_bin_ids": selected_bins['bin_id'].tolist()
+        "truck_capacity": int(truck_capacity),
+        "selected_bin_ids": selected_bins['bin_id'].astype(str).tolist()
     }
+    if road_path is not None:
+        result["road_path"] = road_path
     
-    os.makedirs("outputs/optimized_routes", exist_ok=True)
-    with open("outputs/optimized_routes/waste_routes.json", "w") as f:
+    outputs_dir = os.path.join(base_path, "outputs/optimized_routes")
+    os.makedirs(outputs_dir, exist_ok=True)
+    with open(os.path.join(outputs_dir, "waste_routes.json"), "w") as f:
         json.dump(result, f, indent=4)
         
     return result
@@ -73,10 +119,11 @@ def route_dijkstra(prioritized_bins: pd.DataFrame, truck_capacity: int = 20) ->
 if __name__ == "__main__":
     from waste.routing import calculate_bin_priority, get_high_priority_bins
     from integration.preprocess import load_and_preprocess
+    from waste.road_network import load_road_network
     
     df = load_and_preprocess("data/raw/pune_waste_management_dataset_15000_rows.csv")
     df_prio = calculate_bin_priority(df)
     high_prio = get_high_priority_bins(df_prio)
-    route = route_dijkstra(high_prio)
+    route = route_dijkstra(high_prio, road_network=load_road_network())
     print("Waste Route Summary:")
     print(json.dumps(route, indent=2))
@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+import pickle
+import os
+
+from waste.routing import priority_components
+
+# Fallback when no bin in the area has two readings since its last collection: full in about 3 days
+DEFAULT_FILL_RATE_PER_HOUR = 100 / 72
+# A fill drop larger than this between consecutive readings means the bin was emptied
+RESET_DROP = 20.0
+
+def fit_fill_rates(df: pd.DataFrame, reset_drop: float = RESET_DROP) -> pd.DataFrame:
+    """
+    Fill rate (percentage points per hour) of every bin from its reading history.
+    Only readings since the bin was last emptied are used. The slope of fill against time is
+    a grouped least-squares fit done with bincount sums over all bins at once:
+    slope = sum((t - t_mean) * (y - y_mean)) / sum((t - t_mean)^2) per bin.
+    Bins with fewer than two usable readings (or a flat history) take their area's median rate,
+    or DEFAULT_FILL_RATE_PER_HOUR when no bin in the area has one; rate_source says which applied.
+    """
+    df = df[['bin_id', 'area', 'timestamp', 'fill_percentage']].copy()
+    df['bin_id'] = df['bin_id'].astype(str)
+    df = df.sort_values(['bin_id', 'timestamp'], kind='stable').reset_index(drop=True)
+    codes, bin_ids = pd.factorize(df['bin_id'], sort=False)
+    y = df['fill_percentage'].to_numpy(dtype=float)
+
+    # Keep the segment after each bin's last emptying
+    new_bin = np.r_[True, codes[1:] != codes[:-1]]
+    emptied = np.r_[False, np.diff(y) < -reset_drop] & ~new_bin
+    segment = np.cumsum(new_bin | emptied)
+    last_segment = np.maximum.reduceat(segment, np.flatnonzero(new_bin))[codes]
+    keep = segment == last_segment
+    df, codes, y = df[keep], codes[keep], y[keep]
+
+    n_bins = len(bin_ids)
+    hours = (df['timestamp'] - df['timestamp'].min()).dt.total_seconds().to_numpy() / 3600
+    count = np.bincount(codes, minlength=n_bins)
+    t_mean = np.bincount(codes, weights=hours, minlength=n_bins) / count
+    y_mean = np.bincount(codes, weights=y, minlength=n_bins) / count
+    dt = hours - t_mean[codes]
+    sxx = np.bincount(codes, weights=dt * dt, minlength=n_bins)
+    sxy = np.bincount(codes, weights=dt * (y - y_mean[codes]), minlength=n_bins)
+    fitted = (count >= 2) & (sxx > 0)
+    slope = np.divide(sxy, sxx, out=np.full(n_bins, np.nan), where=fitted)
+
+    # Rows are sorted by bin then time, so each bin's latest reading is where the code changes
+    last = df[np.r_[codes[1:] != codes[:-1], True]]
+    rates = pd.DataFrame({
+        'bin_id': bin_ids,
+        'area': last['area'].astype(str).to_numpy(),
+        'readings_used': count,
+        'fill_rate_per_hour': np.clip(slope, 0, None),
+        'last_fill_percentage': last['fill_percentage'].to_numpy(dtype=float),
+        'last_timestamp': last['timestamp'].to_numpy(),
+    })
+    area_rate = rates.groupby('area')['fill_rate_per_hour'].median()
+    fallback = rates['area'].map(area_rate)
+    rates['rate_source'] = np.where(fitted, 'bin', np.where(fallback.notna(), 'area', 'default'))
+    rates['fill_rate_per_hour'] = rates['fill_rate_per_hour'].fillna(fallback).fillna(DEFAULT_FILL_RATE_PER_HOUR)
+    if not fitted.any():
+        print("No bin has two readings since it was last emptied; every bin uses the default fill rate")
+    rates['hours_to_full'] = (100 - rates['last_fill_percentage']) / rates['fill_rate_per_hour'].replace(0, np.nan)
+    return rates
+
+def train_fill_rate_model(df: pd.DataFrame, model_path="models/waste_demand_model.pkl", base_path=""):
+    """
+    Fit per-bin fill rates and save them as the waste demand model.
+    Returns (rates, model) like the other train_* functions; the model is the rates frame itself.
+    """
+    full_model_path = os.path.join(base_path, model_path)
+    rates = fit_fill_rates(df)
+    os.makedirs(os.path.dirname(full_model_path), exist_ok=True)
+    with open(full_model_path, "wb") as f:
+        pickle.dump(rates, f)
+    return rates, rates
+
+def load_fill_rate_model(model_path="models/waste_demand_model.pkl", base_path=""):
+    """Saved rates frame, or None if the model has not been trained yet."""
+    full_model_path = os.path.join(base_path, model_path)
+    if not os.path.exists(full_model_path) or os.path.getsize(full_model_path) == 0:
+        return None
+    with open(full_model_path, "rb") as f:
+        return pickle.load(f)
+
+def collection_schedule(rates: pd.DataFrame, bins: pd.DataFrame = None, days: int = 3, threshold: float = 90.0,
+                        daily_capacity: int = None, start=None) -> tuple:
+    """
+    Multi-day collection plan from predicted fills. Day d collects every bin predicted to pass
+    threshold before day d + 1 starts (emptied bins then refill at their rate), so half-empty bins
+    are skipped. With daily_capacity no day collects more than that many bins: an overloaded day
+    keeps its most urgent bins (furthest past full by the end of the day) and pushes the rest to
+    the next day, while spare room on a light day is filled with the bins due the next day,
+    fullest first, which flattens truck load across days.
+    bins (latest readings) supplies population_density, overflow_risk and positions for the router;
+    each row gets the calculate_bin_priority score of its predicted fill.
+    Returns (schedule, unserviceable): one row per (collection_date, bin), and the bins still due
+    after the last day because every day was full (bin_id, area, predicted_fill_percentage).
+    """
+    start = pd.Timestamp(start) if start is not None else pd.Timestamp(rates['last_timestamp'].max()).normalize() + pd.Timedelta(days=1)
+    rate = rates['fill_rate_per_hour'].to_numpy(dtype=float)
+    hours_since = (start - pd.to_datetime(rates['last_timestamp'])).dt.total_seconds().to_numpy() / 3600
+    fill = np.clip(rates['last_fill_percentage'].to_numpy(dtype=float) + rate * np.maximum(hours_since, 0), 0, 100)
+
+    planned = []
+    for day in range(days):
+        # Not clipped at 100, so bins pushed back from a full day rank by how far past full they are
+        end_of_day = fill + rate * 24
+        due = end_of_day >= threshold
+        if daily_capacity is not None and due.sum() > daily_capacity:
+            # Over capacity: the least urgent due bins wait for the next day
+            waiting = np.flatnonzero(due)
+            waiting = waiting[np.argsort(end_of_day[waiting], kind='stable')][:due.sum() - daily_capacity]
+            due[waiting] = False
+        elif daily_capacity is not None and due.sum() < daily_capacity:
+            # Fill spare capacity with tomorrow's bins, fullest first
+            tomorrow = np.flatnonzero(~due & (end_of_day + rate * 24 >= threshold))
+            tomorrow = tomorrow[np.argsort(-end_of_day[tomorrow], kind='stable')][:daily_capacity - due.sum()]
+            due[tomorrow] = True
+        collected = np.flatnonzero(due)
+        planned.append(pd.DataFrame({
+            'collection_date': (start + pd.Timedelta(days=day)).date(),
+            'row': collected,
+            'predicted_fill_percentage': np.clip(end_of_day[collected], 0, 100),
+        }))
+        fill = np.where(due, rate * 24 / 2, end_of_day)  # emptied mid-day on average
+
+    overdue = np.flatnonzero(fill >= threshold)
+    unserviceable = pd.DataFrame({
+        'bin_id': rates['bin_id'].iloc[overdue].to_numpy(),
+        'area': rates['area'].iloc[overdue].to_numpy(),
+        'predicted_fill_percentage': np.clip(fill[overdue], 0, 100),
+    })
+
+    schedule = pd.concat(planned, ignore_index=True)
+    schedule = pd.concat([rates[['bin_id', 'area', 'fill_rate_per_hour']].iloc[schedule['row']].reset_index(drop=True),
+                          schedule.drop(columns='row')], axis=1)
+    if bins is not None:
+        extra = [c for c in ['overflow_risk', 'population_density', 'latitude', 'longitude'] if c in bins.columns]
+        latest = bins.assign(bin_id=bins['bin_id'].astype(str)).sort_values('timestamp', kind='stable').drop_duplicates('bin_id', keep='last')
+        schedule = schedule.merge(latest[['bin_id'] + extra], on='bin_id', how='left')
+        if {'overflow_risk', 'population_density'}.issubset(extra):
+            _, _, schedule['priority'] = priority_components(schedule['predicted_fill_percentage'], schedule['overflow_risk'], schedule['population_density'])
+    return schedule, unserviceable
+
+def bins_for_day(schedule: pd.DataFrame, collection_date) -> pd.DataFrame:
+    """Scheduled bins for one day, in the shape route_fleet / route_dijkstra take."""
+    day = schedule[schedule['collection_date'] == pd.Timestamp(collection_date).date()]
+    if 'priority' in day.columns:
+        day = day.sort_values(by='priority', ascending=False)
+    return day.reset_index(drop=True)
+
+if __name__ == "__main__":
+    from integration.preprocess import load_and_preprocess
+    from waste.vrp import route_fleet
+
+    df = load_and_preprocess("data/raw/pune_waste_management_dataset_15000_rows.csv", time_col="timestamp")
+    rates, _ = train_fill_rate_model(df)
+    schedule, unserviceable = collection_schedule(rates, df, days=3, daily_capacity=4000)
+    print(schedule.groupby('collection_date').size())
+    print(f"{len(unserviceable)} bins still due after the last day")
+    first_day = schedule['collection_date'].min()
+    fleet, _ = route_fleet(bins_for_day(schedule, first_day), num_trucks=5, truck_capacity=20)
+    print(f"{first_day}: {len(fleet)} trucks, {sum(t['total_distance_km'] for t in fleet):.1f} km")
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 import datetime
 
 class WasteRecord(BaseModel):
@@ -8,7 +9,10 @@ class WasteRecord(BaseModel):
     overflow_risk: int = Field(..., ge=0, le=1, description="Binary flag indicating if the bin is at high risk of overflowing")
     population_density: float = Field(..., ge=0, description="Population density surrounding the bin (people per sq km)")
     timestamp: datetime.datetime = Field(..., description="Time the reading was recorded")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Bin latitude in degrees", json_schema_extra={"dtype": "float64"})
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Bin longitude in degrees", json_schema_extra={"dtype": "float64"})
 
 class WasteRouteRequest(BaseModel):
     truck_capacity: int = Field(20, ge=1, description="Maximum number of bins the truck can collect")
+    num_trucks: int = Field(1, ge=1, description="Number of trucks available for the collection shift")
     priority_threshold: float = Field(12.0, ge=0, description="Minimum priority score needed to schedule a collection")
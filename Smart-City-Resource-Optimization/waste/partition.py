@@ -0,0 +1,109 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from integration.executor import run_domain_tasks, pool_size
+from waste.spatial import ensure_bin_coordinates, HaversineDistances, DEPOT_COORDS
+from waste.vrp import solve_cvrp, spatial_neighbors, limit_fleet, improve_routes, fleet_summary, save_fleet
+
+def partition_bins(bins: pd.DataFrame, by: str = "area", n_partitions: int = None, seed: int = 42) -> np.ndarray:
+    """
+    Partition label per bin: its area, or a k-means cluster of positions (n_partitions clusters,
+    by default one per area) so that large areas can be split and small neighbours grouped.
+    """
+    if by == "area":
+        return pd.factorize(bins['area'].astype(str), sort=True)[0]
+    if by != "cluster":
+        raise ValueError(f"Unknown partitioning '{by}', expected 'area' or 'cluster'")
+    n_partitions = min(n_partitions or bins['area'].nunique(), len(bins))
+    # Roughly isotropic km coordinates so clusters are compact on the ground
+    xy = np.column_stack([bins['latitude'].to_numpy(dtype=float) * 111.0,
+                          bins['longitude'].to_numpy(dtype=float) * 111.0 * np.cos(np.radians(DEPOT_COORDS[0]))])
+    return MiniBatchKMeans(n_clusters=n_partitions, random_state=seed, n_init=3).fit_predict(xy)
+
+def _solve_partition(lat, lon, num_trucks: int, capacity: int, time_budget: float) -> dict:
+    """CVRP over one partition's bins (node i = bin i - 1 of the partition); runs in a worker process."""
+    lat = np.r_[DEPOT_COORDS[0], lat]
+    lon = np.r_[DEPOT_COORDS[1], lon]
+    dist = HaversineDistances(lat, lon)
+    demands = np.r_[0, np.ones(len(lat) - 1)]
+    return solve_cvrp(dist, demands, num_trucks, capacity, time_budget=time_budget, neighbors=spatial_neighbors(lat, lon))
+
+def stitch_routes(dist, routes: list, demands: np.ndarray, capacity: float, num_trucks: int, neighbors: np.ndarray,
+                  time_budget: float = 1.0) -> tuple:
+    """
+    Join per-partition tours into one fleet plan. Part-loaded tours from neighbouring partitions are
+    merged down to num_trucks, then relocate/Or-opt and 2-opt* moves over city-wide neighbour lists
+    rebalance bins across partition boundaries (interior moves were already exhausted per partition).
+    Returns (routes, unassigned).
+    """
+    deadline = time.perf_counter() + time_budget
+    routes, unassigned = limit_fleet(dist, routes, demands, capacity, num_trucks, deadline=deadline)
+    return improve_routes(dist, routes, demands, capacity, neighbors, deadline), unassigned
+
+def route_fleet_partitioned(prioritized_bins: pd.DataFrame, num_trucks: int = 5, truck_capacity: int = 20,
+                            by: str = "area", n_partitions: int = None, time_budget: float = 2.0,
+                            stitch_budget: float = 1.0, backend: str = "process", max_workers: int = None,
+                            base_path: str = "") -> tuple:
+    """
+    City-wide fleet planning split by zone: bins are partitioned (by area or spatial cluster),
+    each partition gets its own trucks (enough for its bins) and is solved in parallel on the
+    executor backend, then the tours are stitched and balanced across partition boundaries.
+    All tours start and end at the city depot.
+    time_budget is the wall-clock budget of the whole partition phase, as for route_fleet: each
+    partition gets a share proportional to its bins, scaled by the number of pool workers running
+    partitions side by side. stitch_budget is added on top for the stitching moves.
+    Returns (fleet in the route_fleet shape, unassigned bin_ids as in route_fleet,
+    timings per partition plus "stitch" and "total").
+    """
+    start = time.perf_counter()
+    if 'priority' in prioritized_bins.columns:
+        prioritized_bins = prioritized_bins.sort_values(by='priority', ascending=False)
+    over_capacity = prioritized_bins['bin_id'].iloc[num_trucks * truck_capacity:].astype(str).tolist()
+    bins = ensure_bin_coordinates(prioritized_bins.head(num_trucks * truck_capacity).reset_index(drop=True))
+    labels = partition_bins(bins, by=by, n_partitions=n_partitions)
+    lat = bins['latitude'].to_numpy(dtype=float)
+    lon = bins['longitude'].to_numpy(dtype=float)
+
+    members = {f"partition_{p}": np.flatnonzero(labels == p) for p in np.unique(labels)}
+    # Partitions run in waves of `workers`, so a bin's share of the budget is workers * time_budget / bins
+    workers = min(pool_size(len(members), backend, max_workers), len(members))
+    tasks = {
+        name: (_solve_partition, (lat[rows], lon[rows], int(np.ceil(len(rows) / truck_capacity)), truck_capacity,
+                                  time_budget * workers * len(rows) / len(bins)), {})
+        for name, rows in members.items()
+    }
+    results, timings = run_domain_tasks(tasks, backend=backend, max_workers=max_workers)
+
+    # Partition-local node ids -> city-wide node ids (bin row + 1)
+    routes = []
+    for name, rows in members.items():
+        routes.extend([(rows[np.array(route) - 1] + 1).tolist() for route in results[name]["routes"]])
+        # Bins a partition could not place get another chance fleet-wide
+        routes.extend([[int(rows[node - 1] + 1)] for node in results[name]["unassigned"]])
+
+    stitch_start = time.perf_counter()
+    all_lat = np.r_[DEPOT_COORDS[0], lat]
+    all_lon = np.r_[DEPOT_COORDS[1], lon]
+    dist = HaversineDistances(all_lat, all_lon)
+    demands = np.r_[0, np.ones(len(bins))]
+    routes, unassigned = stitch_routes(dist, routes, demands, truck_capacity, num_trucks, spatial_neighbors(all_lat, all_lon),
+                              time_budget=stitch_budget)
+    timings["stitch"] = time.perf_counter() - stitch_start
+    timings["total"] = time.perf_counter() - start
+
+    fleet = save_fleet(fleet_summary(bins, routes, dist, truck_capacity), base_path)
+    unplaced = bins['bin_id'].iloc[np.array(unassigned, dtype=np.int64) - 1].astype(str).tolist()
+    return fleet, unplaced + over_capacity, timings
+
+if __name__ == "__main__":
+    from integration.executor import format_timings
+    from integration.preprocess import load_and_preprocess
+    from waste.routing import calculate_bin_priority
+
+    df = load_and_preprocess("data/raw/pune_waste_management_dataset_15000_rows.csv")
+    prio = calculate_bin_priority(df)
+    fleet, unassigned, timings = route_fleet_partitioned(prio, num_trucks=100, truck_capacity=50, by="cluster", n_partitions=16)
+    print(f"{len(fleet)} trucks, {sum(t['total_distance_km'] for t in fleet):.1f} km, {len(unassigned)} bins unassigned")
+    print(format_timings(timings))
@@ -0,0 +1,220 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+from waste.routing import priority_components
+
+PRIORITY_INPUTS = ['fill_percentage', 'overflow_risk', 'population_density']
+# Result size at which above() switches from walking the heap to one vectorised pass over every bin
+ABOVE_SCAN_CUTOFF = 1024
+
+def _is_integral(value) -> bool:
+    """Whether value can be stored in an int column without losing anything."""
+    if isinstance(value, (bool, int, np.bool_, np.integer)):
+        return True
+    try:
+        return float(value).is_integer()
+    except (TypeError, ValueError):
+        return False
+
+class BinPriorityIndex:
+    """
+    Live bin priorities: an indexed binary max-heap of bins keyed by bin_id.
+    A fill-level update, citizen report or new bin re-ranks one bin in O(log n);
+    top_k and above read the heap without rescanning or re-sorting every bin.
+    Bin attributes live in slot-indexed column arrays that grow by doubling, so adding a bin is
+    amortised O(1) and keeps each column's dtype, and frames are served from the index with take.
+    """
+    def __init__(self, bins: pd.DataFrame):
+        bins = bins.reset_index(drop=True)
+        if bins['bin_id'].duplicated().any():
+            # Readings feeds can hold several rows per bin; the latest one wins
+            if 'timestamp' in bins.columns:
+                bins = bins.sort_values('timestamp', kind='stable')
+            bins = bins.drop_duplicates('bin_id', keep='last').reset_index(drop=True)
+        fill_score, population_weight, priority = priority_components(*(bins[c].to_numpy(dtype=float) for c in PRIORITY_INPUTS))
+        self.n = len(bins)
+        self.columns = {}
+        for column in bins.columns:
+            # Categorical columns would reject values (new bin_ids, areas) arriving through update
+            values = bins[column].astype(object) if isinstance(bins[column].dtype, pd.CategoricalDtype) else bins[column]
+            self.columns[column] = values.to_numpy().copy()
+        self.columns['bin_id'] = bins['bin_id'].astype(str).to_numpy(dtype=object)
+        self.columns['fill_score'] = np.asarray(fill_score, dtype=float)
+        self.columns['population_weight'] = np.asarray(population_weight, dtype=float)
+        self.columns['priority'] = np.asarray(priority, dtype=float)
+        self.slot_of = {b: i for i, b in enumerate(self.columns['bin_id'])}
+
+        # Heap of slots; order by priority descending gives a valid heap in O(n log n) once
+        self.heap = np.argsort(-self.columns['priority'], kind='stable').tolist()
+        self.pos = [0] * len(self.heap)
+        for i, slot in enumerate(self.heap):
+            self.pos[slot] = i
+
+    @property
+    def priority(self) -> np.ndarray:
+        return self.columns['priority']
+
+    @property
+    def bins(self) -> pd.DataFrame:
+        """All bins as a frame (the calculate_bin_priority columns), in slot order."""
+        return pd.DataFrame({column: values[:self.n] for column, values in self.columns.items()})
+
+    def _grow(self):
+        """Double every column's capacity; slots past self.n are unused."""
+        capacity = max(2 * len(self.priority), 16)
+        for column, values in self.columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:len(values)] = values
+            self.columns[column] = grown
+
+    def _set(self, slot: int, column: str, value):
+        values = self.columns.get(column)
+        if values is None:
+            # New attribute: missing for every other bin
+            values = np.full(len(self.priority), None, dtype=object)
+            self.columns[column] = values
+        elif values.dtype.kind in "iub" and not _is_integral(value):
+            values = values.astype(float)
+            self.columns[column] = values
+        elif values.dtype.kind == "M":
+            value = np.datetime64(pd.Timestamp(value).to_datetime64(), np.datetime_data(values.dtype)[0])
+        values[slot] = value
+
+    def _add_slot(self, bin_id: str, values: dict) -> int:
+        if self.n == len(self.priority):
+            self._grow()
+        slot = self.n
+        self.n += 1
+        for column, column_values in self.columns.items():
+            if column in values:
+                continue
+            # Fill the row as missing; int columns the new bin doesn't set become float so they can hold NaN
+            if column_values.dtype.kind in "iub":
+                column_values = column_values.astype(float)
+                self.columns[column] = column_values
+            column_values[slot] = {"f": np.nan, "M": np.datetime64("NaT"), "m": np.timedelta64("NaT")}.get(column_values.dtype.kind)
+        self.columns['bin_id'][slot] = bin_id
+        self.slot_of[bin_id] = slot
+        self.heap.append(slot)
+        self.pos.append(len(self.heap) - 1)
+        return slot
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, bin_id):
+        return str(bin_id) in self.slot_of
+
+    def _swap(self, i: int, j: int):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.pos[heap[i]] = i
+        self.pos[heap[j]] = j
+
+    def _sift_up(self, i: int):
+        while i > 0:
+            parent = (i - 1) // 2
+            if self.priority[self.heap[parent]] >= self.priority[self.heap[i]]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int):
+        n = len(self.heap)
+        while True:
+            largest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and self.priority[self.heap[child]] > self.priority[self.heap[largest]]:
+                    largest = child
+            if largest == i:
+                break
+            self._swap(i, largest)
+            i = largest
+
+    def update(self, bin_id, **values) -> float:
+        """
+        Change a bin's attributes (e.g. fill_percentage=87.5) and re-rank it in O(log n).
+        Unknown bin_ids are added; new bins need all priority inputs. Returns the new priority.
+        """
+        bin_id = str(bin_id)
+        slot = self.slot_of.get(bin_id)
+        if slot is None:
+            missing = [c for c in PRIORITY_INPUTS if c not in values]
+            if missing:
+                raise ValueError(f"New bin {bin_id} needs {missing}")
+            slot = self._add_slot(bin_id, values)
+            old = -np.inf
+        else:
+            old = self.priority[slot]
+        for column, value in values.items():
+            self._set(slot, column, value)
+        fill_score, population_weight, priority = priority_components(*(float(self.columns[c][slot]) for c in PRIORITY_INPUTS))
+        self.columns['fill_score'][slot] = fill_score
+        self.columns['population_weight'][slot] = population_weight
+        self.priority[slot] = priority
+
+        if priority > old:
+            self._sift_up(self.pos[slot])
+        else:
+            self._sift_down(self.pos[slot])
+        return float(priority)
+
+    def report_overflow(self, bin_id, **values) -> float:
+        """Citizen report of an overflowing bin: treat it as full and at risk, then re-rank."""
+        return self.update(bin_id, fill_percentage=100.0, overflow_risk=1, **values)
+
+    def top_k(self, k: int) -> list:
+        """bin_ids of the k highest-priority bins, highest first, in O(k log k)."""
+        if not self.heap:
+            return []
+        out = []
+        frontier = [(-self.priority[self.heap[0]], 0)]
+        while frontier and len(out) < k:
+            _, i = heapq.heappop(frontier)
+            out.append(self.heap[i])
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(self.heap):
+                    heapq.heappush(frontier, (-self.priority[self.heap[child]], child))
+        return self.columns['bin_id'].take(out).tolist()
+
+    def above(self, threshold: float) -> list:
+        """bin_ids with priority >= threshold, highest first; only heap nodes at or above it are visited."""
+        return self.columns['bin_id'].take(self._above_slots(threshold)).tolist()
+
+    def _above_slots(self, threshold: float) -> np.ndarray:
+        # Best-first walk of the heap like top_k, pruning subtrees below threshold: O(m log m) for m results.
+        # Past ABOVE_SCAN_CUTOFF results a vectorised pass over all slots is cheaper than the Python walk.
+        heap, priority = self.heap, self.priority
+        out = []
+        frontier = [(-priority[heap[0]], 0)] if heap and priority[heap[0]] >= threshold else []
+        while frontier:
+            if len(out) >= ABOVE_SCAN_CUTOFF:
+                found = np.flatnonzero(priority[:self.n] >= threshold)
+                return found[np.argsort(-priority.take(found), kind='stable')]
+            _, i = heapq.heappop(frontier)
+            out.append(heap[i])
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap) and priority[heap[child]] >= threshold:
+                    heapq.heappush(frontier, (-priority[heap[child]], child))
+        return np.array(out, dtype=np.int64)
+
+    def _take(self, slots: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({column: values.take(slots) for column, values in self.columns.items()})
+
+    def frame(self, bin_ids: list) -> pd.DataFrame:
+        """Current rows for bin_ids, in the given order (the calculate_bin_priority columns)."""
+        return self._take(np.array([self.slot_of[str(b)] for b in bin_ids], dtype=np.int64))
+
+    def high_priority_frame(self, threshold: float = 12.0) -> pd.DataFrame:
+        """Index-backed equivalent of get_high_priority_bins(calculate_bin_priority(df), threshold)."""
+        return self._take(self._above_slots(threshold))
+
+if __name__ == "__main__":
+    from integration.preprocess import load_and_preprocess
+
+    df = load_and_preprocess("data/raw/pune_waste_management_dataset_15000_rows.csv", time_col="timestamp")
+    index = BinPriorityIndex(df)
+    print(f"High Priority Bins: {len(index.above(12.0))}")
+    index.report_overflow(index.top_k(len(index))[-1])
+    print(index.frame(index.top_k(5))[['bin_id', 'area', 'fill_percentage', 'priority']])
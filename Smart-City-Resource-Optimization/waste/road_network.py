@@ -0,0 +1,246 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from waste.contraction import ContractionHierarchy
+
+ROAD_GRAPH_PATH = "data/raw/pune_road_network_edges.csv"
+CACHE_DIR = "data/processed/road_network"
+
+def load_edge_list(graph_path: str) -> pd.DataFrame:
+    """
+    Read a road graph as an undirected edge list (source, target, distance_km).
+    Accepts a CSV with those columns or a GraphML file whose edges carry a distance_km (or weight) attribute.
+    Parallel edges keep the shortest distance.
+    """
+    if graph_path.endswith(".graphml"):
+        G = nx.read_graphml(graph_path)
+        rows = [(str(u), str(v), float(d.get("distance_km", d.get("weight", 1.0)))) for u, v, d in G.edges(data=True)]
+        edges = pd.DataFrame(rows, columns=["source", "target", "distance_km"])
+    else:
+        edges = pd.read_csv(graph_path, dtype={"source": str, "target": str})
+    u = np.where(edges["source"] <= edges["target"], edges["source"], edges["target"])
+    v = np.where(edges["source"] <= edges["target"], edges["target"], edges["source"])
+    edges = pd.DataFrame({"source": u, "target": v, "distance_km": edges["distance_km"].astype(float)})
+    edges = edges[edges["source"] != edges["target"]]
+    return edges.groupby(["source", "target"], as_index=False)["distance_km"].min()
+
+class RoadNetwork:
+    """
+    Shortest-path distances between terminals (depots and collection points) on a road graph.
+    All-pairs terminal distances are computed once (many-to-many over a contraction hierarchy),
+    saved as a float32 .npy matrix, and looked up in O(1). When the graph file changes, only the rows
+    affected by the changed edges are recomputed (see update_edges) instead of the whole matrix.
+    Node-to-node distances and paths off the terminal set go through the hierarchy.
+    """
+    def __init__(self, nodes: list, edges: pd.DataFrame, terminals: list):
+        self.nodes = list(nodes)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.edges = self._indexed(edges)
+        missing = [t for t in terminals if t not in self.node_index]
+        if missing:
+            raise ValueError(f"Terminals not found in road graph: {missing}")
+        self.terminals = list(terminals)
+        self.terminal_index = {t: i for i, t in enumerate(self.terminals)}
+        self.terminal_nodes = np.array([self.node_index[t] for t in self.terminals], dtype=np.int64)
+        self.matrix = None
+        self._hierarchy = None
+
+    def _indexed(self, edges: pd.DataFrame) -> dict:
+        """{(u, v): distance} over node indices with u < v."""
+        for node in pd.unique(pd.concat([edges["source"], edges["target"]])):
+            if node not in self.node_index:
+                self.node_index[node] = len(self.nodes)
+                self.nodes.append(node)
+        u = edges["source"].map(self.node_index).to_numpy()
+        v = edges["target"].map(self.node_index).to_numpy()
+        lo, hi = np.minimum(u, v), np.maximum(u, v)
+        return dict(zip(zip(lo.tolist(), hi.tolist()), edges["distance_km"].astype(float).tolist()))
+
+    def csgraph(self) -> csr_matrix:
+        n = len(self.nodes)
+        if not self.edges:
+            return csr_matrix((n, n))
+        keys = np.array(list(self.edges.keys()), dtype=np.int64)
+        weights = np.array(list(self.edges.values()), dtype=float)
+        return csr_matrix((weights, (keys[:, 0], keys[:, 1])), shape=(n, n))
+
+    def _dijkstra(self, sources) -> np.ndarray:
+        return dijkstra(self.csgraph(), directed=False, indices=np.atleast_1d(sources))
+
+    @property
+    def hierarchy(self) -> ContractionHierarchy:
+        """Contraction hierarchy of the current edges, built on first use."""
+        if self._hierarchy is None:
+            keys = np.array(list(self.edges.keys()), dtype=np.int64).reshape(-1, 2)
+            self._hierarchy = ContractionHierarchy.build(len(self.nodes), keys[:, 0], keys[:, 1], list(self.edges.values()))
+        return self._hierarchy
+
+    def compute(self):
+        """All-pairs shortest paths between terminals."""
+        self.matrix = self.hierarchy.distance_table(self.terminal_nodes, self.terminal_nodes).astype(np.float32)
+        return self.matrix
+
+    def update_edges(self, changes: pd.DataFrame) -> int:
+        """
+        Apply edge changes (source, target, distance_km; NaN removes the edge) and patch the matrix.
+        Shorter or new edges: D[s, t] = min(D[s, t], d(s, u) + w + d(v, t), d(s, v) + w + d(u, t)),
+        needing only Dijkstra from u and v. Longer or removed edges: only terminals whose shortest-path
+        tree used the edge are recomputed.
+        Returns the number of terminal rows recomputed from scratch.
+        """
+        if not self.matrix.flags.writeable:
+            # Loaded read-only from the cache (memory-mapped); patch a private copy
+            self.matrix = np.array(self.matrix)
+        recomputed = 0
+        for row in changes.itertuples(index=False):
+            for node in (row.source, row.target):
+                if node not in self.node_index:
+                    self.node_index[node] = len(self.nodes)
+                    self.nodes.append(node)
+            u, v = sorted((self.node_index[row.source], self.node_index[row.target]))
+            if u == v:
+                continue
+            old = self.edges.get((u, v), np.inf)
+            new = float(row.distance_km) if pd.notna(row.distance_km) else np.inf
+            if new == old:
+                continue
+            self._hierarchy = None
+
+            if new < old:
+                self.edges[(u, v)] = new
+                d_u, d_v = self._dijkstra([u, v])[:, self.terminal_nodes]
+                via = np.minimum(d_u[:, None] + new + d_v[None, :], d_v[:, None] + new + d_u[None, :])
+                self.matrix = np.minimum(self.matrix, via).astype(np.float32)
+                continue
+
+            # Longer or removed: a terminal is affected if the edge lies on one of its shortest paths
+            d_u, d_v = self._dijkstra([u, v])[:, self.terminal_nodes]
+            affected = np.flatnonzero(np.isclose(np.abs(d_u - d_v), old, rtol=1e-6, atol=1e-9) & np.isfinite(d_u))
+            if np.isinf(new):
+                del self.edges[(u, v)]
+            else:
+                self.edges[(u, v)] = new
+            if len(affected) == 0:
+                continue
+            rows = self._dijkstra(self.terminal_nodes[affected])[:, self.terminal_nodes].astype(np.float32)
+            self.matrix[affected, :] = rows
+            self.matrix[:, affected] = rows.T
+            recomputed += len(affected)
+        return recomputed
+
+    def distance(self, a, b) -> float:
+        """Shortest road distance between two terminals, in O(1)."""
+        return float(self.matrix[self.terminal_index[a], self.terminal_index[b]])
+
+    def node_distance(self, a, b) -> float:
+        """Shortest road distance between any two graph nodes."""
+        return self.hierarchy.distance(self.node_index[a], self.node_index[b])
+
+    def path(self, a, b) -> tuple:
+        """(distance, node names along the shortest road path from a to b)."""
+        distance, nodes = self.hierarchy.path(self.node_index[a], self.node_index[b])
+        return distance, [self.nodes[i] for i in nodes]
+
+    def table(self, sources: list, targets: list) -> np.ndarray:
+        """Many-to-many shortest road distances between arbitrary graph nodes."""
+        return self.hierarchy.distance_table([self.node_index[s] for s in sources], [self.node_index[t] for t in targets])
+
+    def expand_route(self, stops: list) -> list:
+        """Road nodes driven along a sequence of stops (consecutive shortest paths joined)."""
+        nodes = stops[:1]
+        for a, b in zip(stops, stops[1:]):
+            nodes.extend(self.path(a, b)[1][1:])
+        return nodes
+
+    def submatrix(self, names: list) -> np.ndarray:
+        """Distances between a subset of terminals, in the given order."""
+        idx = np.array([self.terminal_index[n] for n in names], dtype=np.int64)
+        return np.asarray(self.matrix[np.ix_(idx, idx)])
+
+    def edge_frame(self) -> pd.DataFrame:
+        keys = list(self.edges.keys())
+        return pd.DataFrame({
+            "source": [self.nodes[u] for u, _ in keys],
+            "target": [self.nodes[v] for _, v in keys],
+            "distance_km": list(self.edges.values()),
+        })
+
+    def save(self, cache_dir: str):
+        """Persist the matrix (.npy) plus the nodes, terminals and edges it was computed from, and the hierarchy if built."""
+        os.makedirs(cache_dir, exist_ok=True)
+        hierarchy_path = os.path.join(cache_dir, "hierarchy.npz")
+        if self._hierarchy is not None:
+            self._hierarchy.save(hierarchy_path)
+        elif os.path.exists(hierarchy_path):
+            os.remove(hierarchy_path)
+        np.save(os.path.join(cache_dir, "terminal_distances.npy"), self.matrix)
+        self.edge_frame().to_csv(os.path.join(cache_dir, "edges.csv"), index=False)
+        with open(os.path.join(cache_dir, "meta.json"), "w") as f:
+            json.dump({"nodes": self.nodes, "terminals": self.terminals}, f)
+
+    @classmethod
+    def load_cached(cls, cache_dir: str):
+        meta_path = os.path.join(cache_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        edges = pd.read_csv(os.path.join(cache_dir, "edges.csv"), dtype={"source": str, "target": str})
+        network = cls(meta["nodes"], edges, meta["terminals"])
+        network.matrix = np.load(os.path.join(cache_dir, "terminal_distances.npy"), mmap_mode="r")
+        hierarchy_path = os.path.join(cache_dir, "hierarchy.npz")
+        if os.path.exists(hierarchy_path):
+            network._hierarchy = ContractionHierarchy.load(hierarchy_path)
+        return network
+
+def _edge_diff(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Edges added, removed (distance NaN) or re-weighted between two edge lists."""
+    merged = pd.merge(old, new, on=["source", "target"], how="outer", suffixes=("_old", "_new"))
+    changed = ~np.isclose(merged["distance_km_old"].fillna(-1), merged["distance_km_new"].fillna(-1))
+    diff = merged[changed]
+    return pd.DataFrame({"source": diff["source"], "target": diff["target"], "distance_km": diff["distance_km_new"]})
+
+def build_road_network(graph_path: str, terminals: list, cache_dir: str = CACHE_DIR) -> RoadNetwork:
+    """
+    Load the terminal distance matrix for graph_path, reusing the saved one when possible.
+    Unchanged graph and terminals -> straight from disk. Some edges changed -> incremental update.
+    Otherwise (first run or a different terminal set) -> full computation.
+    """
+    edges = load_edge_list(graph_path)
+    cached = RoadNetwork.load_cached(cache_dir)
+    if cached is not None and cached.terminals == list(terminals):
+        diff = _edge_diff(cached.edge_frame(), edges)
+        if len(diff) == 0:
+            return cached
+        recomputed = cached.update_edges(diff)
+        print(f"Road network: {len(diff)} edges changed, {recomputed} terminal rows recomputed")
+        cached.hierarchy  # rebuild now so the next run loads it from disk
+        cached.save(cache_dir)
+        return cached
+
+    network = RoadNetwork([], edges, terminals)
+    network.compute()
+    network.save(cache_dir)
+    return network
+
+def load_road_network(base_path: str = "", terminals: list = None):
+    """
+    Road network for the depot and area collection points, or None when no graph file is present
+    (routing then falls back to synthetic area distances).
+    """
+    graph_path = os.path.join(base_path, ROAD_GRAPH_PATH)
+    if not os.path.exists(graph_path):
+        return None
+    if terminals is None:
+        from waste.spatial import AREA_CENTROIDS
+        terminals = ["Depot"] + list(AREA_CENTROIDS)
+    return build_road_network(graph_path, terminals, cache_dir=os.path.join(base_path, CACHE_DIR))
+
+if __name__ == "__main__":
+    network = load_road_network()
+    print(pd.DataFrame(np.asarray(network.matrix), index=network.terminals, columns=network.terminals).round(2))
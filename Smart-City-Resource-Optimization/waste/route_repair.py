@@ -0,0 +1,179 @@
+import time
+import numpy as np
+import pandas as pd
+
+from waste.dijkstra import area_distance_matrix
+from waste.spatial import has_bin_coordinates, ensure_bin_coordinates, HaversineDistances, DEPOT_COORDS
+from waste.vrp import AreaDistances, cheapest_insertion, two_opt, route_distance, area_stops
+
+class RoutePlan:
+    """
+    Per-truck routes of a running shift, kept live so urgent bins can be slotted in
+    without re-planning: cheapest feasible insertion over the trucks' unserved stops,
+    then a bounded 2-opt on the route that changed. Node 0 is the depot; nodes 1.. are bins.
+    Distances follow route_fleet: great-circle between bin positions when every planned bin has
+    latitude/longitude, area-level otherwise (road_network's shortest paths when given, synthetic otherwise).
+    """
+    def __init__(self, bins: pd.DataFrame, routes: list, capacities: list, served: list = None, road_network=None):
+        bins = bins.reset_index(drop=True)
+        self.by_area = not has_bin_coordinates(bins)
+        self.road_network = road_network
+        self.bin_ids = [None] + bins['bin_id'].astype(str).tolist()
+        self.areas = ["Depot"] + bins['area'].astype(str).tolist()
+        if self.by_area:
+            self.lat = self.lon = None
+        else:
+            self.lat = np.r_[DEPOT_COORDS[0], bins['latitude'].to_numpy(dtype=float)]
+            self.lon = np.r_[DEPOT_COORDS[1], bins['longitude'].to_numpy(dtype=float)]
+        self.node_of = {b: i for i, b in enumerate(self.bin_ids) if b is not None}
+        self.area_names = []
+        self.dist = self._distances()
+        self.routes = [[self.node_of[str(b)] for b in route] for route in routes]
+        self.capacities = list(capacities)
+        self.served = list(served) if served is not None else [0] * len(self.routes)
+
+    def _distances(self):
+        if not self.by_area:
+            return HaversineDistances(self.lat, self.lon)
+        areas = ["Depot"] + sorted(set(self.areas[1:]))
+        if areas != self.area_names:
+            # Only a bin in a new area needs a new area matrix
+            self.area_names = areas
+            self.area_matrix = area_distance_matrix(areas, self.road_network)
+        area_index = {area: i for i, area in enumerate(self.area_names)}
+        return AreaDistances(self.area_matrix, np.array([area_index[a] for a in self.areas]))
+
+    @classmethod
+    def from_fleet(cls, fleet, bins: pd.DataFrame, served: list = None, road_network=None) -> "RoutePlan":
+        """
+        Rebuild the plan from route_fleet output (a list of trucks) or route_dijkstra output (a single
+        truck's dict); selected_bin_ids are in visiting order.
+        bins must hold the bin_id, area and (optionally) latitude/longitude of the planned bins.
+        Each truck's capacity is its truck_capacity; routes saved before that field existed fall back
+        to bins_collected / truck_load_percentage, which the rounded percentage makes approximate.
+        """
+        if isinstance(fleet, dict):
+            # route_dijkstra lists its bins by priority; an area tour that visits each area once
+            # gives their visiting order
+            stops = fleet["route"][1:-1]
+            if len(set(stops)) == len(stops):
+                area_of = bins.assign(bin_id=bins['bin_id'].astype(str)).drop_duplicates('bin_id', keep='last').set_index('bin_id')['area'].astype(str)
+                stop_of = {area: i for i, area in enumerate(stops)}
+                order = sorted(fleet["selected_bin_ids"], key=lambda b: stop_of.get(area_of.get(str(b)), len(stops)))
+                fleet = dict(fleet, selected_bin_ids=order)
+            fleet = [fleet]
+        planned = [str(b) for truck in fleet for b in truck["selected_bin_ids"]]
+        rows = bins.assign(bin_id=bins['bin_id'].astype(str)).drop_duplicates('bin_id', keep='last').set_index('bin_id')
+        missing = [b for b in planned if b not in rows.index]
+        if missing:
+            raise ValueError(f"{len(missing)} planned bins are not in the bin data (e.g. {missing[:3]})")
+        rows = rows.loc[planned].reset_index()
+        capacities = [
+            truck["truck_capacity"] if "truck_capacity" in truck
+            else round(truck["bins_collected"] * 100 / truck["truck_load_percentage"]) if truck["truck_load_percentage"] else 0
+            for truck in fleet
+        ]
+        return cls(rows, [truck["selected_bin_ids"] for truck in fleet], capacities, served, road_network)
+
+    def mark_served(self, truck: int, stops: int):
+        """Record that a truck has emptied its first `stops` bins; those stay in place from now on."""
+        self.served[truck] = min(stops, len(self.routes[truck]))
+
+    def _add_node(self, row) -> int:
+        self.bin_ids.append(str(row['bin_id']))
+        self.areas.append(str(row['area']))
+        if not self.by_area:
+            self.lat = np.r_[self.lat, float(row['latitude'])]
+            self.lon = np.r_[self.lon, float(row['longitude'])]
+        self.node_of[self.bin_ids[-1]] = len(self.bin_ids) - 1
+        self.dist = self._distances()
+        return len(self.bin_ids) - 1
+
+    def route_km(self, truck: int) -> float:
+        return route_distance(self.dist, self.routes[truck])
+
+    def insert_urgent(self, urgent_bins: pd.DataFrame, max_repair_moves: int = 20) -> dict:
+        """
+        Insert urgent bins (bin_id, area, and latitude/longitude on a coordinate plan), most urgent first.
+        Each goes to the truck and position with the least added distance among trucks with spare
+        capacity, never before a stop already served; the changed route then gets up to
+        max_repair_moves 2-opt moves over its unserved part.
+        Returns the route diff: per-bin placements, bins that did not fit, and before/after per changed truck.
+        """
+        start = time.perf_counter()
+        if 'priority' in urgent_bins.columns:
+            urgent_bins = urgent_bins.sort_values(by='priority', ascending=False)
+        if not self.by_area:
+            urgent_bins = ensure_bin_coordinates(urgent_bins)
+        before = {}
+        inserted, already_planned, unassigned = [], [], []
+
+        for _, row in urgent_bins.iterrows():
+            bin_id = str(row['bin_id'])
+            if bin_id in self.node_of and any(self.node_of[bin_id] in r for r in self.routes):
+                already_planned.append(bin_id)
+                continue
+            node = self.node_of.get(bin_id) or self._add_node(row)
+
+            best = None
+            for t, route in enumerate(self.routes):
+                if len(route) >= self.capacities[t]:
+                    continue
+                added, pos = cheapest_insertion(self.dist, route, node, start=self.served[t])
+                if best is None or added < best[0]:
+                    best = (added, t, pos)
+            if best is None:
+                unassigned.append(bin_id)
+                continue
+
+            added, t, pos = best
+            if t not in before:
+                before[t] = (list(self.routes[t]), self.route_km(t))
+            self.routes[t].insert(pos, node)
+            self.routes[t], _ = two_opt(self.dist, self.routes[t], fixed=self.served[t], max_moves=max_repair_moves)
+            inserted.append({"bin_id": bin_id, "truck": t, "position": self.routes[t].index(node), "added_km": round(added, 3)})
+
+        trucks = []
+        for t, (old_route, old_km) in sorted(before.items()):
+            trucks.append({
+                "truck": t,
+                "before_km": round(old_km, 2),
+                "after_km": round(self.route_km(t), 2),
+                "before_bin_ids": [self.bin_ids[n] for n in old_route],
+                "after_bin_ids": [self.bin_ids[n] for n in self.routes[t]],
+                "remaining_capacity": self.capacities[t] - len(self.routes[t]),
+            })
+        return {
+            "inserted": inserted,
+            "already_planned": already_planned,
+            "unassigned": unassigned,
+            "trucks": trucks,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def to_fleet(self) -> list:
+        """Current plan in the route_fleet output shape."""
+        fleet = []
+        for t, route in enumerate(self.routes):
+            fleet.append({
+                "route": area_stops(self.areas[n] for n in route),
+                "total_distance_km": round(self.route_km(t), 2),
+                "bins_collected": len(route),
+                "truck_load_percentage": round(len(route) / self.capacities[t] * 100, 1) if self.capacities[t] else 0.0,
+                "truck_capacity": self.capacities[t],
+                "selected_bin_ids": [self.bin_ids[n] for n in route],
+            })
+        return fleet
+
+if __name__ == "__main__":
+    from waste.routing import calculate_bin_priority, get_high_priority_bins
+    from waste.vrp import route_fleet
+    from integration.preprocess import load_and_preprocess
+
+    df = load_and_preprocess("data/raw/pune_waste_management_dataset_15000_rows.csv")
+    high_prio = get_high_priority_bins(calculate_bin_priority(df))
+    fleet, _ = route_fleet(high_prio.head(100), num_trucks=5, truck_capacity=25)
+    plan = RoutePlan.from_fleet(fleet, high_prio, served=[3] * len(fleet))
+    urgent = pd.DataFrame([{"bin_id": "BIN-CITIZEN-999", "area": "Baner", "priority": 99.9}])
+    diff = plan.insert_urgent(urgent)
+    print(diff["inserted"], diff["unassigned"], f"{diff['seconds'] * 1000:.1f} ms")
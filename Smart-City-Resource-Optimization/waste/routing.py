@@ -1,23 +1,29 @@
 import pandas as pd
 import numpy as np
 
-def calculate_bin_priority(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Calculates the priority of each bin based on:
-    - Fill percentage score (1-10)
-    - Overflow risk multiplier
-    - Population density weight
-    """
+def priority_components(fill_percentage, overflow_risk, population_density) -> tuple:
+    """(fill_score, population_weight, priority) for scalars or arrays."""
     # 1. Fill Level Scoring (0-100% -> 1-10)
-    df['fill_score'] = np.ceil(df['fill_percentage'] / 10).clip(lower=1, upper=10)
+    fill_score = np.clip(np.ceil(fill_percentage / 10), 1, 10)
     
     # 2. Population Weight (normalize population density 5000-20000 -> 0-5)
     pop_min = 5000
     pop_max = 20000
-    df['population_weight'] = ((df['population_density'] - pop_min) / (pop_max - pop_min) * 5).clip(lower=0, upper=5)
+    population_weight = np.clip((population_density - pop_min) / (pop_max - pop_min) * 5, 0, 5)
     
     # 3. Urgency Boost (Formula: priority = fill_score + overflow_risk*2 + population_weight)
-    df['priority'] = df['fill_score'] + (df['overflow_risk'] * 2) + df['population_weight']
+    return fill_score, population_weight, fill_score + (overflow_risk * 2) + population_weight
+
+def calculate_bin_priority(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculates the priority of each bin based on:
+    - Fill percentage score (1-10)
+    - Overflow risk multiplier
+    - Population density weight
+    """
+    df['fill_score'], df['population_weight'], df['priority'] = priority_components(
+        df['fill_percentage'], df['overflow_risk'], df['population_density']
+    )
     
     # Sort by priority descending
     df = df.sort_values(by='priority', ascending=False)
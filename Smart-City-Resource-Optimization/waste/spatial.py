@@ -0,0 +1,133 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0
+
+# Area centroids (same mock coordinates the dashboard map uses)
+AREA_CENTROIDS = {
+    "Shivajinagar": [18.5314, 73.8446],
+    "Kothrud": [18.5074, 73.8077],
+    "Hingne Khurd": [18.4831, 73.8219],
+    "Wakad": [18.5987, 73.7688],
+    "Baner": [18.5590, 73.7868],
+    "Viman Nagar": [18.5679, 73.9143],
+    "Kalyani Nagar": [18.5471, 73.9033],
+    "Koregaon Park": [18.5362, 73.8939]
+}
+DEPOT_COORDS = [18.5204, 73.8567]
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works element-wise on arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def has_bin_coordinates(df: pd.DataFrame) -> bool:
+    return {'latitude', 'longitude'}.issubset(df.columns) and df[['latitude', 'longitude']].notna().all().all()
+
+def ensure_bin_coordinates(df: pd.DataFrame, spread_km: float = 1.0) -> pd.DataFrame:
+    """
+    Feeds recorded before bins carried lat/lon get a stable stand-in position: the area centroid
+    plus an offset derived from a hash of bin_id, so the same bin always lands in the same place.
+    """
+    if has_bin_coordinates(df):
+        return df
+    print("Bins have no latitude/longitude; placing them around their area centroids")
+    df = df.copy()
+    digests = [hashlib.md5(str(b).encode("utf-8")).digest() for b in df['bin_id']]
+    u = np.array([[int.from_bytes(d[:4], "little"), int.from_bytes(d[4:8], "little")] for d in digests], dtype=float) / 2**32
+    # Uniform over a disc of radius spread_km around the centroid
+    radius = spread_km * np.sqrt(u[:, 0]) / 111.0
+    angle = 2 * np.pi * u[:, 1]
+    centroids = np.array([AREA_CENTROIDS.get(str(a), DEPOT_COORDS) for a in df['area']], dtype=float)
+    df['latitude'] = centroids[:, 0] + radius * np.sin(angle)
+    df['longitude'] = centroids[:, 1] + radius * np.cos(angle) / np.cos(np.radians(centroids[:, 0]))
+    return df
+
+class HaversineDistances:
+    """
+    Node-to-node great-circle distances computed on demand from coordinates (node 0 = depot).
+    Indexable like a dense matrix (d[i, j], with scalars or arrays), so the routing code never needs n x n memory.
+    """
+    def __init__(self, lat, lon):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def __getitem__(self, key):
+        i, j = key
+        return haversine_km(self.lat[i], self.lon[i], self.lat[j], self.lon[j])
+
+class BinSpatialIndex:
+    """
+    Ball tree (haversine metric) over bin positions for k-nearest and radius queries in O(log n).
+    """
+    def __init__(self, lat, lon, leaf_size: int = 40):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.tree = BallTree(np.radians(np.column_stack([self.lat, self.lon])), metric="haversine", leaf_size=leaf_size)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def knn(self, lat, lon, k: int = 10) -> tuple:
+        """(distances_km, indices) of the k nearest bins to each query point, nearest first."""
+        query = np.radians(np.column_stack([np.atleast_1d(lat), np.atleast_1d(lon)]))
+        dist, idx = self.tree.query(query, k=min(k, len(self)))
+        return dist * EARTH_RADIUS_KM, idx
+
+    def within_radius(self, lat, lon, radius_km: float) -> list:
+        """Indices of bins within radius_km of each query point."""
+        query = np.radians(np.column_stack([np.atleast_1d(lat), np.atleast_1d(lon)]))
+        return list(self.tree.query_radius(query, r=radius_km / EARTH_RADIUS_KM))
+
+    def neighbor_lists(self, k: int = 15) -> np.ndarray:
+        """k nearest other bins of every bin, as an (n, k) index array."""
+        _, idx = self.knn(self.lat, self.lon, k=k + 1)
+        return idx[:, 1:]
+
+class NearestUnvisited:
+    """
+    Repeated "nearest bin not yet visited" lookups for greedy tours.
+    Queries the ball tree with a growing k and rebuilds it over the remaining bins
+    once half of them are visited, so each lookup stays logarithmic (amortized).
+    """
+    def __init__(self, lat, lon):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.visited = np.zeros(len(self.lat), dtype=bool)
+        self.n_remaining = len(self.lat)
+        self._rebuild()
+
+    def _rebuild(self):
+        self.active = np.flatnonzero(~self.visited)
+        self.index = BinSpatialIndex(self.lat[self.active], self.lon[self.active]) if len(self.active) else None
+        self.visited_in_active = 0
+
+    def remaining(self) -> int:
+        return self.n_remaining
+
+    def visit(self, i: int):
+        if not self.visited[i]:
+            self.visited[i] = True
+            self.n_remaining -= 1
+            self.visited_in_active += 1
+            if self.visited_in_active * 2 > len(self.active):
+                self._rebuild()
+
+    def nearest(self, lat: float, lon: float):
+        """Index of the nearest unvisited bin (None when all are visited)."""
+        if self.index is None or self.remaining() == 0:
+            return None
+        k = 8
+        while True:
+            _, idx = self.index.knn(lat, lon, k=k)
+            candidates = self.active[idx[0]]
+            free = candidates[~self.visited[candidates]]
+            if len(free):
+                return int(free[0])
+            k = min(k * 2, len(self.active))
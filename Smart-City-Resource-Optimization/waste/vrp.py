@@ -0,0 +1,485 @@
+import heapq
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from waste.dijkstra import area_distance_matrix
+from waste.spatial import has_bin_coordinates, HaversineDistances, BinSpatialIndex, DEPOT_COORDS
+
+# Node 0 is always the depot; nodes 1..n are the bins to collect.
+DEPOT = 0
+EPS = 1e-9
+
+class AreaDistances:
+    """
+    Bin-to-bin distances looked up from an area-level distance matrix.
+    Indexable like a dense matrix (d[i, j], with scalars or arrays) without materialising n x n values.
+    """
+    def __init__(self, area_matrix, node_area):
+        self.area_matrix = np.asarray(area_matrix, dtype=float)
+        self.node_area = np.asarray(node_area)
+
+    def __len__(self):
+        return len(self.node_area)
+
+    def __getitem__(self, key):
+        i, j = key
+        return self.area_matrix[self.node_area[i], self.node_area[j]]
+
+def nearest_neighbors(dist, k: int = 15, deadline: float = None, block_cells: int = 1 << 22, sample: int = 256) -> np.ndarray:
+    """
+    k nearest bins of every node (row 0, the depot, is unused). Excludes the node itself and the depot.
+    Rows are gathered from dist a block at a time (about block_cells distances) and ranked with argpartition.
+    Once the deadline has passed, the remaining rows are ranked against a random sample of bins instead
+    of all of them, so a large instance still leaves time for the solver.
+    """
+    n = len(dist)
+    k = max(1, min(k, n - 2))
+    neighbors = np.zeros((n, k), dtype=np.int64)
+    candidates = np.arange(n)
+    block = max(1, block_cells // n)
+    for lo in range(1, n, block):
+        if deadline is not None and len(candidates) == n and n - 1 > sample and time.perf_counter() > deadline:
+            candidates = np.sort(np.random.choice(np.arange(1, n), size=max(sample, k + 1), replace=False))
+        rows = np.arange(lo, min(lo + block, n))
+        d = np.array(dist[rows[:, None], candidates[None, :]], dtype=float)
+        # Ties (e.g. every bin of an area under area-level distances) go to the next bins in index order,
+        # wrapping around, so tied nodes get different lists instead of all naming the same few bins
+        scale = np.abs(d).max() if d.size else 1.0
+        d += ((candidates[None, :] - rows[:, None]) % n) / n * (EPS * max(scale, 1.0))
+        d[:, candidates == DEPOT] = np.inf
+        d[rows[:, None] == candidates[None, :]] = np.inf
+        idx = np.argpartition(d, k - 1, axis=1)[:, :k]
+        nearest = np.take_along_axis(d, idx, axis=1)
+        idx = np.take_along_axis(idx, np.argsort(nearest, axis=1, kind="stable"), axis=1)
+        neighbors[rows] = candidates[idx]
+    return neighbors
+
+def route_distance(dist, route: list) -> float:
+    """Length of Depot -> route -> Depot."""
+    if not route:
+        return 0.0
+    path = np.array([DEPOT] + list(route) + [DEPOT])
+    return float(np.sum(dist[path[:-1], path[1:]]))
+
+def savings_construction(dist, demands: np.ndarray, capacity: float, neighbors: np.ndarray) -> list:
+    """
+    Clarke-Wright savings restricted to neighbour pairs:
+    s(a, b) = d(0, a) + d(0, b) - d(a, b), merging route ends in decreasing order of savings.
+    """
+    n = len(demands)
+    a = np.repeat(np.arange(1, n), neighbors.shape[1])
+    b = neighbors[1:].ravel()
+    pairs = np.unique(np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1), axis=0)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    depot = np.zeros(len(pairs), dtype=np.int64)
+    savings = dist[depot, pairs[:, 0]] + dist[depot, pairs[:, 1]] - dist[pairs[:, 0], pairs[:, 1]]
+    order = np.argsort(-savings, kind="stable")
+
+    route_of = list(range(n))
+    routes = {r: [r] for r in range(1, n)}
+    load = {r: float(demands[r]) for r in range(1, n)}
+    for idx in order:
+        if savings[idx] <= EPS:
+            break
+        u, v = int(pairs[idx, 0]), int(pairs[idx, 1])
+        ru, rv = route_of[u], route_of[v]
+        if ru == rv or load[ru] + load[rv] > capacity:
+            continue
+        A, B = routes[ru], routes[rv]
+        if A[-1] == u and B[0] == v:
+            merged = A + B
+        elif A[0] == u and B[-1] == v:
+            merged = B + A
+        elif A[-1] == u and B[-1] == v:
+            merged = A + B[::-1]
+        elif A[0] == u and B[0] == v:
+            merged = A[::-1] + B
+        else:
+            continue
+        # Keep the id of the longer route so fewer nodes need relabelling
+        keep, drop = (ru, rv) if len(A) >= len(B) else (rv, ru)
+        for node in routes[drop]:
+            route_of[node] = keep
+        routes[keep] = merged
+        load[keep] += load.pop(drop)
+        del routes[drop]
+    return list(routes.values())
+
+def _concat_cost(dist, A: list, B: list) -> tuple:
+    """Cheapest way to join two routes into one: (added distance, merged route)."""
+    options = [A + B, A + B[::-1], A[::-1] + B, B + A]
+    costs = [route_distance(dist, r) for r in options]
+    best = int(np.argmin(costs))
+    return costs[best] - route_distance(dist, A) - route_distance(dist, B), options[best]
+
+def cheapest_insertion(dist, route: list, node: int, start: int = 0) -> tuple:
+    """
+    (added distance, position) of the cheapest place to insert node into Depot -> route -> Depot.
+    Positions before start (stops already served) are not considered.
+    """
+    path = np.array([DEPOT] + list(route) + [DEPOT])
+    added = dist[path[:-1], np.full(len(path) - 1, node)] + dist[np.full(len(path) - 1, node), path[1:]] - dist[path[:-1], path[1:]]
+    added = np.where(np.arange(len(added)) >= start, added, np.inf)
+    best = int(np.argmin(added))
+    return float(added[best]), best
+
+def limit_fleet(dist, routes: list, demands: np.ndarray, capacity: float, num_trucks: int, deadline: float = None) -> tuple:
+    """
+    Reduce the plan to at most num_trucks routes. The two lightest routes are joined while they fit
+    together (if they don't, no pair does); otherwise the lightest route is dissolved and its bins are
+    spread over the others by cheapest feasible insertion. Loads live in an array and the lightest
+    routes come off a heap, so each step costs O(log R) plus the routes it touches.
+    Past the deadline, dissolved bins go to the end of the route with the most spare capacity instead.
+    Returns (routes, unassigned_nodes) where unassigned nodes could not be packed into the fleet.
+    """
+    routes = [list(r) for r in routes if r]
+    loads = np.array([float(demands[r].sum()) for r in routes])
+    alive = np.ones(len(routes), dtype=bool)
+    heap = [(load, r) for r, load in enumerate(loads)]
+    heapq.heapify(heap)
+    unassigned = []
+    n_alive = len(routes)
+
+    def pop_lightest():
+        while heap:
+            load, r = heapq.heappop(heap)
+            if alive[r] and load == loads[r]:
+                return r
+        return None
+
+    while n_alive > num_trucks:
+        i = pop_lightest()
+        j = pop_lightest()
+        if loads[i] + loads[j] <= capacity:
+            _, merged = _concat_cost(dist, routes[i], routes[j])
+            routes[i], routes[j] = merged, None
+            loads[i] += loads[j]
+            alive[j] = False
+            n_alive -= 1
+            heapq.heappush(heap, (loads[i], i))
+            continue
+
+        heapq.heappush(heap, (loads[j], j))
+        dissolved, routes[i] = routes[i], None
+        alive[i] = False
+        n_alive -= 1
+        targets = np.flatnonzero(alive)
+        touched = set()
+        for node in sorted(dissolved, key=lambda x: -demands[x]):
+            fits = targets[loads[targets] + demands[node] <= capacity]
+            if len(fits) == 0:
+                unassigned.append(node)
+                continue
+            if deadline is not None and time.perf_counter() > deadline:
+                t = int(fits[np.argmin(loads[fits])])
+                pos = len(routes[t])
+            else:
+                best = None
+                for t in fits:
+                    added, pos = cheapest_insertion(dist, routes[t], node)
+                    if best is None or added < best[0]:
+                        best = (added, int(t), pos)
+                _, t, pos = best
+            routes[t].insert(pos, node)
+            loads[t] += demands[node]
+            touched.add(t)
+        for t in touched:
+            heapq.heappush(heap, (loads[t], t))
+    return [routes[r] for r in np.flatnonzero(alive)], unassigned
+
+def two_opt(dist, route: list, fixed: int = 0, max_moves: int = None) -> tuple:
+    """
+    Best-improvement 2-opt on a single route (depot at both ends). Returns (route, improved).
+    The first `fixed` stops keep their place; max_moves bounds the number of reversals.
+    """
+    if len(route) - fixed < 2:
+        return route, False
+    path = np.array([DEPOT] + list(route) + [DEPOT])
+    m = len(path)
+    local = np.asarray(dist[path[:, None], path[None, :]], dtype=float)
+    order = np.arange(m)
+    i = np.arange(1 + fixed, m - 2)[:, None]
+    j = np.arange(2, m - 1)[None, :]
+    improved = False
+    moves = 0
+    while max_moves is None or moves < max_moves:
+        p = order
+        delta = local[p[i - 1], p[j]] + local[p[i], p[j + 1]] - local[p[i - 1], p[i]] - local[p[j], p[j + 1]]
+        delta = np.where(j > i, delta, np.inf)
+        bi, bj = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[bi, bj] >= -EPS:
+            break
+        bi, bj = bi + 1 + fixed, bj + 2
+        order[bi:bj + 1] = order[bi:bj + 1][::-1].copy()
+        improved = True
+        moves += 1
+    return path[order][1:-1].tolist(), improved
+
+class _Solution:
+    """Routes plus the node -> (route, position) index needed for neighbour-list moves."""
+    def __init__(self, routes: list, demands: np.ndarray, n: int):
+        self.routes = [list(r) for r in routes]
+        self.demands = demands
+        self.route_of = np.full(n, -1, dtype=np.int64)
+        self.pos_of = np.full(n, -1, dtype=np.int64)
+        self.load = [float(demands[r].sum()) if r else 0.0 for r in self.routes]
+        for r in range(len(self.routes)):
+            self.reindex(r)
+
+    def reindex(self, r: int):
+        for p, node in enumerate(self.routes[r]):
+            self.route_of[node] = r
+            self.pos_of[node] = p
+
+    def pred(self, node: int) -> int:
+        p = self.pos_of[node]
+        return self.routes[self.route_of[node]][p - 1] if p > 0 else DEPOT
+
+    def succ(self, node: int) -> int:
+        route = self.routes[self.route_of[node]]
+        p = self.pos_of[node]
+        return route[p + 1] if p + 1 < len(route) else DEPOT
+
+def segment_moves(dist, sol: _Solution, neighbors: np.ndarray, capacity: float, deadline: float, max_segment: int = 3) -> set:
+    """
+    One pass of relocate (segment length 1) and Or-opt (lengths 2..max_segment) moves, within and across routes.
+    A segment is moved next to one of its first node's nearest neighbours, in either orientation,
+    whenever that shortens the total distance and the receiving truck has capacity.
+    Returns the set of routes that changed.
+    """
+    changed = set()
+    n = len(sol.route_of)
+    for u in np.random.permutation(np.arange(1, n)):
+        if time.perf_counter() > deadline:
+            break
+        u = int(u)
+        if sol.route_of[u] < 0:
+            continue
+        for length in range(1, max_segment + 1):
+            r = int(sol.route_of[u])
+            route = sol.routes[r]
+            pos = int(sol.pos_of[u])
+            if pos + length > len(route):
+                break
+            seg = route[pos:pos + length]
+            first, last = seg[0], seg[-1]
+            prev = route[pos - 1] if pos > 0 else DEPOT
+            nxt = route[pos + length] if pos + length < len(route) else DEPOT
+            seg_load = float(sol.demands[seg].sum())
+            remove_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+            if remove_gain <= EPS:
+                continue
+
+            move = None
+            for v in neighbors[u]:
+                v = int(v)
+                if v in seg or sol.route_of[v] < 0:
+                    continue
+                r2 = int(sol.route_of[v])
+                if r2 != r and sol.load[r2] + seg_load > capacity:
+                    continue
+                for a, b in ((v, sol.succ(v)), (sol.pred(v), v)):
+                    if a in seg or b in seg:
+                        continue
+                    forward = dist[a, first] + dist[last, b]
+                    backward = dist[a, last] + dist[first, b]
+                    add = min(forward, backward) - dist[a, b]
+                    if add - remove_gain < -EPS:
+                        move = (r2, a, b, forward <= backward)
+                        break
+                if move:
+                    break
+            if not move:
+                continue
+
+            r2, a, b, keep_orientation = move
+            del route[pos:pos + length]
+            inserted = seg if keep_orientation else seg[::-1]
+            target = sol.routes[r2]
+            if a != DEPOT:
+                at = target.index(a) + 1
+            else:
+                at = target.index(b) if b != DEPOT else 0
+            target[at:at] = inserted
+            sol.load[r] -= seg_load
+            sol.load[r2] += seg_load
+            sol.reindex(r)
+            if r2 != r:
+                sol.reindex(r2)
+            changed.update((r, r2))
+            break
+    return changed
+
+def tail_exchange_moves(dist, sol: _Solution, neighbors: np.ndarray, capacity: float, deadline: float) -> set:
+    """
+    One pass of 2-opt* moves between two routes: cut both after u and v and reconnect
+    either u -> succ(v) / v -> succ(u) (tails swapped) or u -> v / succ(u) -> succ(v)
+    (heads joined, tails joined, each reversed as needed), subject to capacity.
+    Returns the set of routes that changed.
+    """
+    changed = set()
+    n = len(sol.route_of)
+    for u in np.random.permutation(np.arange(1, n)):
+        if time.perf_counter() > deadline:
+            break
+        u = int(u)
+        r = int(sol.route_of[u])
+        if r < 0:
+            continue
+        for v in neighbors[u]:
+            v = int(v)
+            r2 = int(sol.route_of[v])
+            if r2 < 0 or r2 == r:
+                continue
+            A, B = sol.routes[r], sol.routes[r2]
+            p, q = int(sol.pos_of[u]), int(sol.pos_of[v])
+            su, sv = sol.succ(u), sol.succ(v)
+            base = dist[u, su] + dist[v, sv]
+            head_a = float(sol.demands[A[:p + 1]].sum())
+            head_b = float(sol.demands[B[:q + 1]].sum())
+            new_routes = None
+            if dist[u, sv] + dist[v, su] - base < -EPS and head_a + sol.load[r2] - head_b <= capacity and head_b + sol.load[r] - head_a <= capacity:
+                new_routes = (A[:p + 1] + B[q + 1:], B[:q + 1] + A[p + 1:])
+            elif dist[u, v] + dist[su, sv] - base < -EPS and head_a + head_b <= capacity and sol.load[r] + sol.load[r2] - head_a - head_b <= capacity:
+                new_routes = (A[:p + 1] + B[:q + 1][::-1], A[p + 1:][::-1] + B[q + 1:])
+            if new_routes is None:
+                continue
+            sol.routes[r], sol.routes[r2] = list(new_routes[0]), list(new_routes[1])
+            for t in (r, r2):
+                sol.load[t] = float(sol.demands[sol.routes[t]].sum()) if sol.routes[t] else 0.0
+                sol.reindex(t)
+            changed.update((r, r2))
+            break
+    return changed
+
+def improve_routes(dist, routes: list, demands: np.ndarray, capacity: float, neighbors: np.ndarray, deadline: float) -> list:
+    """Relocate/Or-opt and 2-opt* passes, with 2-opt on every touched route, until none helps or the deadline."""
+    sol = _Solution(routes, demands, len(demands))
+    while time.perf_counter() < deadline:
+        changed = segment_moves(dist, sol, neighbors, capacity, deadline)
+        changed |= tail_exchange_moves(dist, sol, neighbors, capacity, deadline)
+        for r in changed:
+            sol.routes[r], _ = two_opt(dist, sol.routes[r])
+            sol.reindex(r)
+        if not changed:
+            break
+    return [r for r in sol.routes if r]
+
+def solve_cvrp(dist, demands, num_trucks: int, capacity: float, time_budget: float = 2.0, neighbors: np.ndarray = None, k: int = 15, seed: int = 42) -> dict:
+    """
+    Capacitated vehicle routing: assign every node 1..n to at most num_trucks depot-based tours
+    without exceeding capacity, minimising total distance.
+    Construction uses Clarke-Wright savings; improvement alternates relocate/Or-opt and 2-opt* moves
+    (neighbour-list driven, within and across routes) with 2-opt on every touched route
+    until no move helps or time_budget seconds have passed.
+    Returns {"routes": [[node, ...], ...], "unassigned": [...], "total_distance": float}.
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    np.random.seed(seed)
+    demands = np.asarray(demands, dtype=float)
+    if neighbors is None:
+        # Leave at least half the budget for construction and improvement
+        neighbors = nearest_neighbors(dist, k, deadline=start + time_budget / 2)
+
+    routes = savings_construction(dist, demands, capacity, neighbors)
+    routes, unassigned = limit_fleet(dist, routes, demands, capacity, num_trucks, deadline=deadline)
+    routes = [two_opt(dist, r)[0] if time.perf_counter() < deadline else r for r in routes]
+
+    routes = improve_routes(dist, routes, demands, capacity, neighbors, deadline)
+    return {
+        "routes": routes,
+        "unassigned": unassigned,
+        "total_distance": sum(route_distance(dist, r) for r in routes),
+        "solve_seconds": time.perf_counter() - start,
+    }
+
+def spatial_neighbors(lat, lon, k: int = 15) -> np.ndarray:
+    """Neighbour lists over [Depot] + bins from a ball tree (row 0, the depot, is unused)."""
+    n = len(lat) - 1
+    if n < 2:
+        return None
+    k = min(k, n - 1)
+    return np.vstack([np.zeros((1, k), dtype=np.int64), BinSpatialIndex(lat[1:], lon[1:]).neighbor_lists(k=k) + 1])
+
+def area_stops(bin_areas) -> list:
+    """Depot -> areas -> Depot, with consecutive bins in the same area collapsed into one stop."""
+    stops = ["Depot"]
+    for area in bin_areas:
+        if area != stops[-1]:
+            stops.append(area)
+    stops.append("Depot")
+    return stops
+
+def route_fleet(prioritized_bins: pd.DataFrame, num_trucks: int = 5, truck_capacity: int = 20, time_budget: float = 2.0,
+                dist=None, base_path: str = "", road_network=None) -> tuple:
+    """
+    Plan collection tours for a fleet. Each truck collects up to truck_capacity bins;
+    if the fleet cannot take every bin, the highest-priority ones are kept.
+    dist is indexable over [Depot] + bins; by default bins with latitude/longitude use great-circle
+    distances between their positions, and bins without inherit area-level distances
+    (road_network's precomputed shortest paths when given, synthetic otherwise).
+    Returns (fleet, unassigned): one dict per truck in the waste_routes.json shape (also written to
+    waste_fleet_routes.json), and the bin_ids left out, either beyond the fleet's capacity or unplaceable.
+    """
+    if 'priority' in prioritized_bins.columns:
+        prioritized_bins = prioritized_bins.sort_values(by='priority', ascending=False)
+    bins = prioritized_bins.head(num_trucks * truck_capacity).reset_index(drop=True)
+    over_capacity = prioritized_bins['bin_id'].iloc[len(bins):].astype(str).tolist()
+    bin_areas = bins['area'].astype(str).to_numpy()
+    neighbors = None
+    if dist is None and has_bin_coordinates(bins):
+        # Real bin positions: great-circle distances and ball-tree neighbour lists
+        lat = np.r_[DEPOT_COORDS[0], bins['latitude'].to_numpy(dtype=float)]
+        lon = np.r_[DEPOT_COORDS[1], bins['longitude'].to_numpy(dtype=float)]
+        dist = HaversineDistances(lat, lon)
+        neighbors = spatial_neighbors(lat, lon)
+    elif dist is None:
+        areas = ["Depot"] + sorted(set(bin_areas))
+        area_matrix = area_distance_matrix(areas, road_network)
+        area_index = {area: i for i, area in enumerate(areas)}
+        dist = AreaDistances(area_matrix, np.array([0] + [area_index[a] for a in bin_areas]))
+
+    demands = np.r_[0, np.ones(len(bins))]
+    solution = solve_cvrp(dist, demands, num_trucks, truck_capacity, time_budget=time_budget, neighbors=neighbors)
+
+    unplaced = bins['bin_id'].iloc[np.array(solution["unassigned"], dtype=np.int64) - 1].astype(str).tolist()
+    fleet = save_fleet(fleet_summary(bins, solution["routes"], dist, truck_capacity), base_path)
+    return fleet, unplaced + over_capacity
+
+def fleet_summary(bins: pd.DataFrame, routes: list, dist, truck_capacity: int) -> list:
+    """One dict per truck in the waste_routes.json shape; routes hold node ids (bin row + 1)."""
+    bin_areas = bins['area'].astype(str).to_numpy()
+    fleet = []
+    for route in routes:
+        bin_rows = np.array(route) - 1
+        fleet.append({
+            "route": area_stops(bin_areas[bin_rows]),
+            "total_distance_km": round(route_distance(dist, route), 2),
+            "bins_collected": len(route),
+            "truck_load_percentage": round(len(route) / truck_capacity * 100, 1),
+            "truck_capacity": int(truck_capacity),
+            "selected_bin_ids": bins['bin_id'].iloc[bin_rows].astype(str).tolist(),
+        })
+    return fleet
+
+def save_fleet(fleet: list, base_path: str = "") -> list:
+    outputs_dir = os.path.join(base_path, "outputs/optimized_routes")
+    os.makedirs(outputs_dir, exist_ok=True)
+    with open(os.path.join(outputs_dir, "waste_fleet_routes.json"), "w") as f:
+        json.dump(fleet, f, indent=4)
+    return fleet
+
+if __name__ == "__main__":
+    from waste.routing import calculate_bin_priority, get_high_priority_bins
+    from integration.preprocess import load_and_preprocess
+
+    df = load_and_preprocess("data/raw/pune_waste_management_dataset_15000_rows.csv")
+    high_prio = get_high_priority_bins(calculate_bin_priority(df))
+    fleet, unassigned = route_fleet(high_prio)
+    print(f"{len(unassigned)} bins left for the next shift")
+    for i, truck in enumerate(fleet):
+        print(f"Truck {i + 1}: {truck['total_distance_km']} km, {truck['bins_collected']} bins, {' -> '.join(truck['route'])}")
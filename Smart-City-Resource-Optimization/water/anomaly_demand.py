@@ -5,43 +5,262 @@ from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 import pickle
 import os
+import shutil
+import tempfile
+
+from integration.executor import run_domain_tasks
+from integration.model_registry import ModelRegistry, frame_hash
+from water.isolation_scorer import compiled
+
+LEAK_FEATURES = ['pressure_psi', 'flow_rate_lpm', 'turbidity_ntu', 'chlorine_mgl', 'pH']
+# Versioned leak models (see integration.model_registry); models/water_anomaly_model.pkl holds the latest fit
+LEAK_REGISTRY_PATH = "models/water_anomaly"
+# Batches up to this size are scored by the compiled forest (water.isolation_scorer), larger ones by sklearn
+COMPILED_SCORING_MAX_ROWS = 1000
 
 def analyze_peak_usage(df: pd.DataFrame) -> pd.DataFrame:
-    """Analyze peak water usage times by grouping by hour."""
-    # Ensure timestamp is datetime
-    if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-    df['hour'] = df['timestamp'].dt.hour
-    peak_usage = df.groupby('hour')['flow_rate_lpm'].mean().reset_index()
-    return peak_usage
+    """
+    Analyze peak water usage times: mean flow rate per hour of day.
+    Also accepts an iterable of chunks (see integration.preprocess.iter_preprocessed_chunks).
+    Both are folded into a water.usage_cube.UsageCube; keep a cube around to answer
+    per-area / day-of-week / variance questions without rescanning readings.
+    """
+    # Imported here: usage_cube imports LEAK_FEATURES from this module
+    from water.usage_cube import UsageCube
+
+    cube = UsageCube(features=['flow_rate_lpm'])
+    for chunk in ([df] if isinstance(df, pd.DataFrame) else df):
+        cube.update(chunk)
+    return cube.hourly()
+
+def _leak_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    X = df[LEAK_FEATURES]
+    return X.fillna(X.median())
 
-def train_leak_detection_model(df: pd.DataFrame, model_path="models/water_anomaly_model.pkl", base_path=""):
+def _leak_metadata(df: pd.DataFrame, X: pd.DataFrame) -> dict:
+    """What a leak model was trained on: window, features, data hash and per-feature reference statistics for drift checks."""
+    return {
+        "training_start": str(df['timestamp'].min()) if 'timestamp' in df.columns else None,
+        "training_end": str(df['timestamp'].max()) if 'timestamp' in df.columns else None,
+        "features": LEAK_FEATURES,
+        "data_hash": frame_hash(X),
+        "n_rows": len(X),
+        "feature_mean": X.mean().tolist(),
+        "feature_std": X.std(ddof=0).tolist(),
+    }
+
+def train_leak_detection_model(df: pd.DataFrame, model_path="models/water_anomaly_model.pkl", base_path="",
+                               registry_path=LEAK_REGISTRY_PATH, partition_by=None, backend="process", max_workers=None):
     """
     Train an Isolation Forest for leak detection based on pressure, flow rate, and quality.
     Features: pressure_psi, flow_rate_lpm, turbidity_ntu, chlorine_mgl, pH
+    With partition_by (e.g. 'area' or a sensor group column) one forest is fitted per partition
+    in parallel, see train_partitioned_leak_model.
+    The model is also registered as a new version in the leak model registry (see get_leak_model).
     """
     full_model_path = os.path.join(base_path, model_path)
-    features = ['pressure_psi', 'flow_rate_lpm', 'turbidity_ntu', 'chlorine_mgl', 'pH']
-    X = df[features].copy()
-    
-    # Fill NAs if any
-    X = X.fillna(X.median())
+    X = _leak_matrix(df)
     
     # Train model
-    model = IsolationForest(contamination=0.05, random_state=42)
-    model.fit(X)
+    if partition_by is None:
+        model = IsolationForest(contamination=0.05, random_state=42)
+        model.fit(X)
+    else:
+        model = train_partitioned_leak_model(df, partition_by, backend=backend, max_workers=max_workers)
     
     os.makedirs(os.path.dirname(full_model_path), exist_ok=True)
     with open(full_model_path, "wb") as f:
         pickle.dump(model, f)
+    ModelRegistry(os.path.join(base_path, registry_path)).register(model, dict(_leak_metadata(df, X), partition_by=partition_by))
         
-    # Generate scores
-    df['anomaly_score'] = model.decision_function(X)
-    df['leak_risk_level'] = model.predict(X)  # -1 for anomaly, 1 for normal
-    df['leak_risk_level'] = df['leak_risk_level'].apply(lambda x: "High Risk" if x == -1 else "Normal")
-    
-    return df, model
+    return score_leak_risk(df, model), model
+
+def _fit_partition(matrix_path: str, start: int, stop: int) -> IsolationForest:
+    """Fit one partition's forest on rows start:stop of the shared feature matrix; runs in a worker."""
+    X = np.load(matrix_path, mmap_mode="r")
+    model = IsolationForest(contamination=0.05, random_state=42)
+    model.fit(pd.DataFrame(X[start:stop], columns=LEAK_FEATURES))
+    return model
+
+class PartitionedLeakModel:
+    """
+    Independent leak detectors per partition value (area, sensor group, ...), so each partition is
+    judged against its own baseline. Readings of partitions without a detector (too few training
+    rows, or unseen) fall back to the city-wide one.
+    """
+    def __init__(self, by: str, models: dict, fallback):
+        self.by = by
+        self.models = models
+        self.fallback = fallback
+
+    def decision_function(self, df: pd.DataFrame) -> np.ndarray:
+        X = _leak_matrix(df)
+        codes, keys = pd.factorize(df[self.by].astype(str))
+        scores = np.empty(len(df))
+        for code, key in enumerate(keys):
+            rows = np.flatnonzero(codes == code)
+            scores[rows] = _decision_function(self.models.get(key, self.fallback), X.iloc[rows])
+        return scores
+
+def train_partitioned_leak_model(df: pd.DataFrame, by: str = "area", min_rows: int = 256, backend: str = "process",
+                                 max_workers: int = None) -> PartitionedLeakModel:
+    """
+    Fit one forest per value of `by` (plus the city-wide fallback) in parallel on the executor backend.
+    The feature matrix is written once, sorted by partition, to a .npy file that workers memory-map,
+    so each task only receives a row range instead of a pickled copy of its data.
+    Partitions with fewer than min_rows readings use the fallback.
+    """
+    keys = df[by].astype(str)
+    order = np.argsort(keys.to_numpy(), kind="stable")
+    X = _leak_matrix(df).to_numpy(dtype=float)[order]
+    sorted_keys = keys.to_numpy()[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(order) else np.zeros(0, dtype=int)
+    stops = np.r_[starts[1:], len(order)]
+
+    scratch = tempfile.mkdtemp(prefix="leak_partitions_")
+    try:
+        matrix_path = os.path.join(scratch, "features.npy")
+        np.save(matrix_path, X)
+        tasks = {"__all__": (_fit_partition, (matrix_path, 0, len(X)), {})}
+        for start, stop in zip(starts, stops):
+            if stop - start >= min_rows:
+                tasks[sorted_keys[start]] = (_fit_partition, (matrix_path, int(start), int(stop)), {})
+        results, _ = run_domain_tasks(tasks, backend=backend, max_workers=max_workers)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    fallback = results.pop("__all__")
+    return PartitionedLeakModel(by, results, fallback)
+
+def leak_model_drift(df: pd.DataFrame, metadata: dict) -> float:
+    """Largest shift of a feature mean from the training data, in training standard deviations."""
+    X = _leak_matrix(df)[metadata["features"]]
+    std = np.asarray(metadata["feature_std"], dtype=float)
+    shift = np.abs(X.mean().to_numpy() - np.asarray(metadata["feature_mean"], dtype=float))
+    return float(np.max(shift / np.where(std > 0, std, 1.0)))
+
+def get_leak_model(df: pd.DataFrame, base_path="", registry_path=LEAK_REGISTRY_PATH,
+                   max_age=pd.Timedelta(hours=24), drift_threshold=0.5, partition_by=None, **train_kwargs):
+    """
+    Fit once, score many: the registry's current leak model, retrained on df only when there is none,
+    it was partitioned differently, its training window ended more than max_age before df's newest
+    reading, or df has drifted from the training data by more than drift_threshold (see leak_model_drift).
+    Returns (model, metadata).
+    """
+    registry = ModelRegistry(os.path.join(base_path, registry_path))
+    model, metadata = registry.load_current()
+    if model is not None and metadata["features"] == LEAK_FEATURES and metadata.get("partition_by") == partition_by:
+        stale = ('timestamp' in df.columns and metadata["training_end"] is not None
+                 and df['timestamp'].max() - pd.Timestamp(metadata["training_end"]) > max_age)
+        if not stale and leak_model_drift(df, metadata) <= drift_threshold:
+            return model, metadata
+    _, model = train_leak_detection_model(df.copy(), base_path=base_path, registry_path=registry_path,
+                                          partition_by=partition_by, **train_kwargs)
+    return model, registry.current_metadata()
+
+def detect_leaks(df: pd.DataFrame, base_path="", **kwargs) -> pd.DataFrame:
+    """Score readings with the registered leak model, retraining only when get_leak_model decides to."""
+    model, _ = get_leak_model(df, base_path=base_path, **kwargs)
+    return score_leak_risk(df, model)
+
+def _decision_function(model, X: pd.DataFrame) -> np.ndarray:
+    if len(X) <= COMPILED_SCORING_MAX_ROWS or not hasattr(model, "estimators_"):
+        return compiled(model).decision_function(X.to_numpy(dtype=float))
+    return model.decision_function(X)
+
+def score_leak_risk(df: pd.DataFrame, model) -> pd.DataFrame:
+    """Add anomaly_score and leak_risk_level columns using an already fitted detector."""
+    # predict() is decision_function() < 0, so one pass over the trees gives both columns
+    if isinstance(model, PartitionedLeakModel):
+        df['anomaly_score'] = model.decision_function(df)
+    else:
+        df['anomaly_score'] = _decision_function(model, _leak_matrix(df))
+    df['leak_risk_level'] = np.where(df['anomaly_score'] < 0, "High Risk", "Normal")
+    return df
+
+class OnlineLeakDetector:
+    """
+    Streaming leak detector: per-sensor exponentially weighted mean and variance of LEAK_FEATURES,
+    updated in O(1) time and memory per reading. Each reading is scored against its sensor's
+    statistics before they absorb it; a pressure z-score below -z_threshold raises a pressure drop,
+    a flow z-score above z_threshold a flow spike. Values fed into the statistics are clipped to
+    clip_z standard deviations so a sustained leak does not immediately become the sensor's normal.
+    No alerts are raised for a feature until the sensor has warmup readings of it.
+    """
+    PRESSURE = LEAK_FEATURES.index('pressure_psi')
+    FLOW = LEAK_FEATURES.index('flow_rate_lpm')
+
+    def __init__(self, alpha: float = 0.05, z_threshold: float = 3.0, clip_z: float = 4.0, warmup: int = 10):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.clip_z = clip_z
+        self.warmup = warmup
+        self.sensor_row = {}
+        self.count = np.zeros((0, len(LEAK_FEATURES)), dtype=np.int64)
+        self.mean = np.zeros((0, len(LEAK_FEATURES)))
+        self.var = np.zeros((0, len(LEAK_FEATURES)))
+
+    def _rows(self, sensor_ids) -> np.ndarray:
+        """State row per sensor, growing the arrays (by doubling) for sensors seen for the first time."""
+        rows = np.empty(len(sensor_ids), dtype=np.int64)
+        for i, sensor_id in enumerate(sensor_ids):
+            rows[i] = self.sensor_row.setdefault(sensor_id, len(self.sensor_row))
+        if len(self.sensor_row) > len(self.mean):
+            grow = max(len(self.sensor_row), 2 * len(self.mean)) - len(self.mean)
+            self.count = np.vstack([self.count, np.zeros((grow, len(LEAK_FEATURES)), dtype=np.int64)])
+            self.mean = np.vstack([self.mean, np.zeros((grow, len(LEAK_FEATURES)))])
+            self.var = np.vstack([self.var, np.zeros((grow, len(LEAK_FEATURES)))])
+        return rows
+
+    def _step(self, rows: np.ndarray, X: np.ndarray) -> tuple:
+        """Score one reading each for distinct sensors, then fold the readings into their statistics. Returns (z, warm)."""
+        count, mean, var = self.count[rows], self.mean[rows], self.var[rows]
+        std = np.sqrt(var)
+        valid = ~np.isnan(X)
+        warm = count >= self.warmup
+        z = np.divide(X - mean, std, out=np.zeros_like(X), where=valid & (std > 0))
+
+        # alpha never drops below 1/n, so the first readings give the plain running mean and variance
+        alpha = np.maximum(self.alpha, 1.0 / (count + 1))
+        x = np.where(warm, np.clip(X, mean - self.clip_z * std, mean + self.clip_z * std), X)
+        delta = np.where(valid, x - mean, 0.0)
+        self.mean[rows] = mean + alpha * delta
+        self.var[rows] = np.where(valid, (1 - alpha) * (var + alpha * delta * delta), var)
+        self.count[rows] = count + valid
+        return z, warm
+
+    def _label(self, z: np.ndarray, warm: np.ndarray) -> np.ndarray:
+        drop = warm[:, self.PRESSURE] & (z[:, self.PRESSURE] < -self.z_threshold)
+        spike = warm[:, self.FLOW] & (z[:, self.FLOW] > self.z_threshold)
+        return np.select([drop & spike, drop, spike], ["Pressure Drop + Flow Spike", "Pressure Drop", "Flow Spike"], "Normal")
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score a micro-batch of readings (sensor_id, timestamp and LEAK_FEATURES) in arrival order.
+        Returns a new frame sorted by timestamp with pressure_z, flow_z, online_anomaly_score
+        (largest absolute z-score over the features) and leak_alert ("Normal" when nothing fired).
+        """
+        scored = df.sort_values('timestamp', kind='stable').reset_index(drop=True) if 'timestamp' in df.columns else df.reset_index(drop=True)
+        rows = self._rows(scored['sensor_id'].astype(str).tolist())
+        X = scored[LEAK_FEATURES].to_numpy(dtype=float)
+        z = np.zeros_like(X)
+        warm = np.zeros(X.shape, dtype=bool)
+        # A sensor's readings must be applied in order; each pass takes the next reading of every sensor
+        rank = pd.Series(rows).groupby(rows).cumcount().to_numpy()
+        for r in range(int(rank.max()) + 1 if len(rank) else 0):
+            step = np.flatnonzero(rank == r)
+            z[step], warm[step] = self._step(rows[step], X[step])
+
+        scored['pressure_z'] = z[:, self.PRESSURE]
+        scored['flow_z'] = z[:, self.FLOW]
+        scored['online_anomaly_score'] = np.abs(z).max(axis=1) if len(z) else np.zeros(0)
+        scored['leak_alert'] = self._label(z, warm)
+        return scored
+
+    def observe(self, sensor_id: str, reading: dict) -> str:
+        """Score and absorb a single reading ({feature: value}); returns its leak_alert label."""
+        X = np.array([[reading.get(f, np.nan) for f in LEAK_FEATURES]], dtype=float)
+        z, warm = self._step(self._rows([str(sensor_id)]), X)
+        return str(self._label(z, warm)[0])
 
 def train_demand_prediction_model(df: pd.DataFrame, model_path="models/water_demand_model.pkl", base_path=""):
     """
@@ -10,7 +10,7 @@ class WaterSensorRecord(BaseModel):
     turbidity_ntu: float = Field(..., ge=0, description="Water turbidity level (cloudiness)")
     chlorine_mgl: float = Field(..., ge=0, description="Chlorine concentration in mg/L")
     pH: float = Field(..., ge=0, le=14, description="pH level of the water")
-    is_leak_simulated: int = Field(0, description="Internal flag used for simulation purposes")
+    is_leak_simulated: int = Field(0, ge=0, le=1, description="Internal flag used for simulation purposes")
 
 class WaterDemandForecast(BaseModel):
     date: datetime.date = Field(..., description="Date of the forecast")
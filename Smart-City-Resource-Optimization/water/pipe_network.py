@@ -0,0 +1,142 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import splu
+
+PIPES_PATH = "data/raw/pune_water_pipes.csv"
+PIPE_NODES_PATH = "data/raw/pune_water_pipe_nodes.csv"
+
+def pipe_conductance(length_m, diameter_mm) -> np.ndarray:
+    """Linearised Hazen-Williams conductance (flow per unit head loss), up to a constant factor: D^2.63 / L^0.54."""
+    return (np.asarray(diameter_mm, dtype=float) / 1000) ** 2.63 / np.asarray(length_m, dtype=float) ** 0.54
+
+class PipeNetwork:
+    """
+    Water distribution network with pressure sensors, for locating leaks from pressure deviations.
+    Heads follow the linearised network equations L h = -q, where L is the conductance-weighted
+    Laplacian with source (reservoir) nodes held at fixed head. A leak of size q halfway along pipe
+    (u, v) withdraws q/2 at each end, so the pressure change it causes at the sensors is
+    q * sensitivity[:, pipe] with sensitivity = -(L^-1[sensors, u] + L^-1[sensors, v]) / 2.
+    L is factorised once (sparse LU); by symmetry one solve per sensor gives every pipe's column.
+    The sensitivity matrix itself is kept dense (sensors x pipes): in a looped grid fed from a few
+    reservoirs a leak moves every sensor's pressure, so thresholding small entries drops almost nothing.
+    """
+    def __init__(self, nodes: pd.DataFrame, pipes: pd.DataFrame):
+        self.nodes = nodes.reset_index(drop=True)
+        node_index = {node: i for i, node in enumerate(self.nodes['node'].astype(str))}
+        u = pipes['source'].astype(str).map(node_index)
+        v = pipes['target'].astype(str).map(node_index)
+        if u.isna().any() or v.isna().any():
+            raise ValueError("Pipes reference nodes missing from the node table")
+        u, v = u.to_numpy(dtype=np.int64), v.to_numpy(dtype=np.int64)
+        n = len(self.nodes)
+        conductance = pipe_conductance(pipes['length_m'], pipes['diameter_mm'])
+        adjacency = coo_matrix((np.r_[conductance, conductance], (np.r_[u, v], np.r_[v, u])), shape=(n, n)).tocsr()
+
+        # Nodes cut off from every source have no defined pressure; their pipes are not candidates
+        source = self.nodes['is_source'].to_numpy(dtype=bool)
+        _, component = connected_components(adjacency, directed=False)
+        fed = np.isin(component, component[source])
+        free = np.flatnonzero(fed & ~source)
+        position = np.full(n, -1)
+        position[free] = np.arange(len(free))
+
+        laplacian = (coo_matrix((np.asarray(adjacency.sum(axis=1)).ravel(), (np.arange(n), np.arange(n))), shape=(n, n)) - adjacency).tocsc()
+        solver = splu(laplacian[free][:, free].tocsc())
+
+        sensor_ids = self.nodes['sensor_id'].fillna("").astype(str).to_numpy()
+        sensor_nodes = np.flatnonzero((sensor_ids != "") & (position >= 0))
+        self.sensors = sensor_ids[sensor_nodes].tolist()
+        self.sensor_index = {s: i for i, s in enumerate(self.sensors)}
+        unit = np.zeros((len(free), len(sensor_nodes)))
+        unit[position[sensor_nodes], np.arange(len(sensor_nodes))] = 1.0
+        response = np.zeros((n, len(sensor_nodes)))
+        response[free] = solver.solve(unit)  # response[j, s]: head change at sensor s per unit withdrawal at node j
+
+        candidate = fed[u] & fed[v]
+        self.pipes = pipes[candidate].reset_index(drop=True)
+        u, v = u[candidate], v[candidate]
+        self.sensitivity = -(response[u] + response[v]).T / 2  # (sensors, pipes)
+        self._sensitivity_sq = self.sensitivity ** 2
+        self._endpoints = (u, v)
+
+    def localize(self, deviations: pd.Series, top_k: int = 10) -> pd.DataFrame:
+        """
+        Rank pipes by how well a single leak on them explains the pressure deviations
+        (sensor_id -> observed minus expected pressure; sensors without a value are ignored).
+        The match is the cosine between the deviations and the pipe's sensitivity column over the
+        reporting sensors; leak_size is the least-squares leak magnitude in model units.
+        Returns the top_k pipes with match, leak_size and the pipe's midpoint and area.
+        """
+        deviations = deviations.dropna()
+        rows = np.array([self.sensor_index[s] for s in deviations.index.astype(str) if s in self.sensor_index], dtype=np.int64)
+        values = np.array([v for s, v in zip(deviations.index.astype(str), deviations.to_numpy(dtype=float)) if s in self.sensor_index])
+        d = np.zeros(len(self.sensors))
+        d[rows] = values
+        observed = np.zeros(len(self.sensors))
+        observed[rows] = 1.0
+
+        fit = self.sensitivity.T @ d
+        norm_sq = self._sensitivity_sq.T @ observed
+        d_norm = np.linalg.norm(d)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            match = np.where((norm_sq > 0) & (d_norm > 0), fit / np.sqrt(norm_sq) / d_norm, 0.0)
+            leak_size = np.where(norm_sq > 0, fit / norm_sq, 0.0)
+        # A leak lowers pressure, so only positive leak sizes are physical
+        match[leak_size <= 0] = 0.0
+        top = np.argsort(-match, kind='stable')[:top_k]
+
+        u, v = self._endpoints[0][top], self._endpoints[1][top]
+        result = self.pipes.iloc[top][['source', 'target', 'length_m', 'diameter_mm']].reset_index(drop=True)
+        result['match'] = match[top]
+        result['leak_size'] = leak_size[top]
+        result['latitude'] = (self.nodes['latitude'].to_numpy()[u] + self.nodes['latitude'].to_numpy()[v]) / 2
+        result['longitude'] = (self.nodes['longitude'].to_numpy()[u] + self.nodes['longitude'].to_numpy()[v]) / 2
+        if 'area' in self.nodes.columns:
+            result['area'] = self.nodes['area'].to_numpy()[u]
+        return result
+
+def pressure_deviations(readings: pd.DataFrame, baseline: pd.Series = None) -> pd.Series:
+    """
+    Latest pressure of each sensor minus its baseline (by default the sensor's median over readings),
+    as a sensor_id-indexed series for PipeNetwork.localize.
+    """
+    readings = readings.sort_values('timestamp', kind='stable')
+    sensor = readings['sensor_id'].astype(str)
+    latest = readings['pressure_psi'].groupby(sensor).last()
+    if baseline is None:
+        baseline = readings['pressure_psi'].groupby(sensor).median()
+    return (latest - baseline.reindex(latest.index)).dropna()
+
+def load_pipe_network(base_path: str = ""):
+    """Pipe network from the raw node and pipe tables, or None when they are not present."""
+    pipes_path = os.path.join(base_path, PIPES_PATH)
+    nodes_path = os.path.join(base_path, PIPE_NODES_PATH)
+    if not (os.path.exists(pipes_path) and os.path.exists(nodes_path)):
+        return None
+    nodes = pd.read_csv(nodes_path, dtype={"node": str, "sensor_id": str})
+    pipes = pd.read_csv(pipes_path, dtype={"source": str, "target": str})
+    return PipeNetwork(nodes, pipes)
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    network = load_pipe_network()
+    if network is None:
+        raise SystemExit(f"No pipe network at {PIPES_PATH} / {PIPE_NODES_PATH}; generate one with python data/generate_data.py")
+    print(f"{len(network.pipes)} pipes, {len(network.sensors)} sensors, "
+          f"built in {time.perf_counter() - start:.2f}s")
+
+    # Simulated leak on a random pipe plus sensor noise
+    rng = np.random.default_rng(0)
+    leak = rng.integers(len(network.pipes))
+    signal = network.sensitivity[:, leak] * 50
+    noisy = signal + rng.normal(0, 0.05 * np.abs(signal).max(), len(signal))
+    start = time.perf_counter()
+    ranked = network.localize(pd.Series(noisy, index=network.sensors), top_k=5)
+    print(f"Localised in {(time.perf_counter() - start) * 1000:.1f} ms; true leak "
+          f"{network.pipes.loc[leak, 'source']} - {network.pipes.loc[leak, 'target']}")
+    print(ranked)
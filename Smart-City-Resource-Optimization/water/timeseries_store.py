@@ -0,0 +1,196 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from water.anomaly_demand import LEAK_FEATURES
+
+TIME_DTYPE = np.dtype("<i8")       # nanoseconds since epoch
+VALUE_DTYPE = np.dtype("<f4")
+AREA_DTYPE = np.dtype("<i2")       # index into the store's area list
+
+class SensorTimeSeriesStore:
+    """
+    Persistent per-sensor store for water telemetry.
+    Each sensor gets a directory of fixed-width little-endian column files
+    (timestamp, area code and one file per feature in LEAK_FEATURES), kept in timestamp order.
+    Files are opened as read-only numpy memmaps, so several processes can read them without copying,
+    time windows are sliced with a binary search, and appends only write to the end of each file.
+
+    Layout:
+        <root>/meta.json                 areas and sensor list
+        <root>/<sensor_id>/timestamp.i8
+        <root>/<sensor_id>/area.i2
+        <root>/<sensor_id>/<feature>.f4
+    """
+    def __init__(self, root: str = "data/timeseries/water"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._meta_path = os.path.join(root, "meta.json")
+        self._meta_mtime = None
+        # sensor_id -> (rows, {column: memmap}); reopened only when the sensor's timestamp file grows
+        self._maps = {}
+        self.reload()
+
+    def reload(self):
+        """Re-read the sensor and area lists if another process changed them since the last read."""
+        mtime = os.stat(self._meta_path).st_mtime_ns if os.path.exists(self._meta_path) else None
+        if mtime is not None and mtime == self._meta_mtime:
+            return
+        if mtime is not None:
+            with open(self._meta_path, "r") as f:
+                meta = json.load(f)
+        else:
+            meta = {"areas": [], "sensors": [], "features": LEAK_FEATURES}
+        self._meta_mtime = mtime
+        self.areas = meta["areas"]
+        self.sensors = meta["sensors"]
+        self.features = meta["features"]
+
+    def _save_meta(self):
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"areas": self.areas, "sensors": self.sensors, "features": self.features}, f, indent=4)
+        os.replace(tmp_path, self._meta_path)
+        self._meta_mtime = os.stat(self._meta_path).st_mtime_ns
+
+    def _column_path(self, sensor_id: str, column: str) -> str:
+        if column == "timestamp":
+            return os.path.join(self.root, sensor_id, "timestamp.i8")
+        if column == "area":
+            return os.path.join(self.root, sensor_id, "area.i2")
+        return os.path.join(self.root, sensor_id, f"{column}.f4")
+
+    def _dtype(self, column: str):
+        return {"timestamp": TIME_DTYPE, "area": AREA_DTYPE}.get(column, VALUE_DTYPE)
+
+    def _open(self, sensor_id: str) -> dict:
+        """
+        Read-only memory-mapped arrays of all of a sensor's columns (empty arrays if it has no data).
+        Cached per sensor and reopened only when its timestamp file has grown, so a query costs one stat per sensor.
+        """
+        try:
+            n = os.stat(self._column_path(sensor_id, "timestamp")).st_size // TIME_DTYPE.itemsize
+        except FileNotFoundError:
+            n = 0
+        cached = self._maps.get(sensor_id)
+        if cached is not None and cached[0] == n:
+            return cached[1]
+        maps = {}
+        for column in ["timestamp", "area"] + self.features:
+            path = self._column_path(sensor_id, column)
+            dtype = self._dtype(column)
+            # Size from the timestamp file so a reader never sees a half-appended row
+            rows = min(n, os.path.getsize(path) // dtype.itemsize) if n > 0 and os.path.exists(path) else 0
+            # Plain ndarray views of the mapping: slicing them skips np.memmap's per-slice bookkeeping
+            maps[column] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,)).view(np.ndarray) if rows > 0 else np.empty(0, dtype=dtype)
+        self._maps[sensor_id] = (n, maps)
+        return maps
+
+    def column(self, sensor_id: str, column: str) -> np.ndarray:
+        """Read-only memory-mapped array of one column (empty array if the sensor has no data)."""
+        return self._open(sensor_id)[column]
+
+    def __len__(self):
+        return sum(len(self.column(s, "timestamp")) for s in self.sensors)
+
+    def _area_codes(self, areas: pd.Series) -> np.ndarray:
+        for area in pd.unique(areas.astype(str)):
+            if area not in self.areas:
+                self.areas.append(area)
+        lookup = {area: i for i, area in enumerate(self.areas)}
+        return areas.astype(str).map(lookup).to_numpy(dtype=AREA_DTYPE)
+
+    def append(self, df: pd.DataFrame, skip_stored: bool = False):
+        """
+        Append readings (sensor_id, area, timestamp + features). Rows are sorted per sensor;
+        rows older than a sensor's last stored timestamp are rejected, since the files are append-only.
+        With skip_stored they are skipped silently instead, for syncing from a feed that is re-read in full.
+        Returns the number of rows written.
+        """
+        if len(df) == 0:
+            return 0
+        df = df.sort_values(['sensor_id', 'timestamp'], kind="stable")
+        times = pd.to_datetime(df['timestamp']).to_numpy(dtype="datetime64[ns]").view(TIME_DTYPE)
+        area_codes = self._area_codes(df['area'])
+        sensor_ids = df['sensor_id'].astype(str).to_numpy()
+        values = {feature: df[feature].to_numpy(dtype=VALUE_DTYPE) for feature in self.features}
+
+        written, rejected = 0, 0
+        boundaries = np.flatnonzero(sensor_ids[1:] != sensor_ids[:-1]) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(df)]):
+            sensor_id = sensor_ids[start]
+            existing = self.column(sensor_id, "timestamp")
+            keep = slice(start, end)
+            if len(existing) > 0:
+                first_new = start + np.searchsorted(times[start:end], existing[-1], side="right")
+                rejected += first_new - start
+                keep = slice(first_new, end)
+            if keep.stop - keep.start <= 0:
+                continue
+            if sensor_id not in self.sensors:
+                os.makedirs(os.path.join(self.root, sensor_id), exist_ok=True)
+                self.sensors.append(sensor_id)
+            # Write value columns first and timestamps last: readers size everything off the timestamp file
+            columns = [("area", area_codes)] + [(f, values[f]) for f in self.features] + [("timestamp", times)]
+            for column, array in columns:
+                with open(self._column_path(sensor_id, column), "ab") as f:
+                    f.write(np.ascontiguousarray(array[keep], dtype=self._dtype(column)).tobytes())
+            written += keep.stop - keep.start
+        if rejected and not skip_stored:
+            print(f"Rejected {rejected} readings older than their sensor's last stored timestamp")
+        self._save_meta()
+        return written
+
+    def _bounds(self, times: np.ndarray, start=None, end=None) -> tuple:
+        lo = 0 if start is None else np.searchsorted(times, np.datetime64(pd.Timestamp(start), "ns").view(TIME_DTYPE), side="left")
+        hi = len(times) if end is None else np.searchsorted(times, np.datetime64(pd.Timestamp(end), "ns").view(TIME_DTYPE), side="right")
+        return lo, hi
+
+    def _slice(self, maps: dict, start=None, end=None) -> dict:
+        lo, hi = self._bounds(maps["timestamp"], start, end)
+        return {column: values[lo:hi] for column, values in maps.items()}
+
+    def sensor_window(self, sensor_id: str, start=None, end=None) -> dict:
+        """Zero-copy views of one sensor's columns for start <= timestamp <= end."""
+        return self._slice(self._open(sensor_id), start, end)
+
+    def last_timestamp(self):
+        last = [maps["timestamp"][-1] for maps in (self._open(s) for s in self.sensors) if len(maps["timestamp"]) > 0]
+        return pd.Timestamp(max(last)) if last else None
+
+    def _frame(self, sensors: list, windows: list) -> pd.DataFrame:
+        lengths = np.array([len(w["timestamp"]) for w in windows], dtype=np.int64)
+        if lengths.sum() == 0:
+            return pd.DataFrame(columns=["sensor_id", "area", "timestamp"] + self.features)
+        # One concatenation per column over all sensors' slices, then a single frame
+        columns = {name: np.concatenate([w[name] for w in windows]) for name in ["timestamp", "area"] + self.features}
+        df = pd.DataFrame({
+            "sensor_id": pd.Categorical.from_codes(np.repeat(np.arange(len(sensors)), lengths), categories=sensors),
+            "area": pd.Categorical.from_codes(columns["area"].astype(np.int64), categories=self.areas),
+            "timestamp": columns["timestamp"].view("datetime64[ns]"),
+            **{feature: columns[feature] for feature in self.features},
+        })
+        return df.sort_values('timestamp', kind="stable").reset_index(drop=True)
+
+    def window_frame(self, start=None, end=None, sensors: list = None) -> pd.DataFrame:
+        """Readings across sensors for start <= timestamp <= end as a DataFrame shaped like the raw water feed."""
+        self.reload()
+        sensors = list(sensors or self.sensors)
+        return self._frame(sensors, [self.sensor_window(sensor_id, start, end) for sensor_id in sensors])
+
+    def latest_window(self, days: float = 1) -> pd.DataFrame:
+        """Readings within `days` of the newest stored timestamp (the risk table's last-24h slice)."""
+        self.reload()
+        maps = [self._open(sensor_id) for sensor_id in self.sensors]
+        last = [m["timestamp"][-1] for m in maps if len(m["timestamp"]) > 0]
+        start = pd.Timestamp(max(last)) - pd.Timedelta(days=days) if last else None
+        return self._frame(list(self.sensors), [self._slice(m, start) for m in maps])
+
+if __name__ == "__main__":
+    from integration.preprocess import load_and_preprocess
+
+    store = SensorTimeSeriesStore()
+    df = load_and_preprocess("data/raw/water_pipeline_monitoring_dataset_15000_rows.csv", time_col="timestamp")
+    print(f"Appended {store.append(df)} readings to {store.root}")
+    print(store.latest_window().head())
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from water.anomaly_demand import LEAK_FEATURES
+
+class UsageCube:
+    """
+    Pre-aggregated water usage: count, sum and sum of squares of every feature per
+    (area, day of week, hour of day) cell. update() folds new readings in with bincount,
+    so the cube grows with the number of areas, not readings, and every query is a
+    reduction over a few hundred cells instead of a rescan of the raw history.
+    Days of week follow pandas (Monday=0).
+    """
+    def __init__(self, features: list = LEAK_FEATURES):
+        self.features = list(features)
+        self.areas = []
+        self.area_index = {}
+        shape = (0, 7, 24, len(self.features))
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.sum = np.zeros(shape)
+        self.sumsq = np.zeros(shape)
+
+    def _area_codes(self, areas: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(areas.astype(str))
+        for area in uniques:
+            if area not in self.area_index:
+                self.area_index[area] = len(self.areas)
+                self.areas.append(area)
+        grow = len(self.areas) - len(self.count)
+        if grow > 0:
+            pad = np.zeros((grow,) + self.count.shape[1:])
+            self.count = np.concatenate([self.count, pad.astype(np.int64)])
+            self.sum = np.concatenate([self.sum, pad])
+            self.sumsq = np.concatenate([self.sumsq, pad])
+        return np.array([self.area_index[a] for a in uniques], dtype=np.int64)[codes]
+
+    def update(self, df: pd.DataFrame) -> "UsageCube":
+        """Fold readings (area, timestamp and the cube's features) into the cube. Returns self."""
+        if len(df) == 0:
+            return self
+        timestamps = pd.to_datetime(df['timestamp'])
+        cell = (self._area_codes(df['area']) * 7 + timestamps.dt.dayofweek.to_numpy()) * 24 + timestamps.dt.hour.to_numpy()
+        n_cells = len(self.areas) * 7 * 24
+        count = self.count.reshape(n_cells, -1)
+        total = self.sum.reshape(n_cells, -1)
+        sumsq = self.sumsq.reshape(n_cells, -1)
+        for j, feature in enumerate(self.features):
+            values = df[feature].to_numpy(dtype=float)
+            seen = ~np.isnan(values)
+            count[:, j] += np.bincount(cell[seen], minlength=n_cells)
+            total[:, j] += np.bincount(cell[seen], weights=values[seen], minlength=n_cells)
+            sumsq[:, j] += np.bincount(cell[seen], weights=values[seen] ** 2, minlength=n_cells)
+        return self
+
+    def _select(self, feature: str, area=None, day=None, hour=None) -> tuple:
+        """(count, sum, sumsq) of one feature with the fixed dimensions sliced out."""
+        j = self.features.index(feature)
+        index = (slice(None) if area is None else self.area_index[area],
+                 slice(None) if day is None else day,
+                 slice(None) if hour is None else hour, j)
+        return self.count[index], self.sum[index], self.sumsq[index]
+
+    def summary(self, feature: str = 'flow_rate_lpm', by: str = None, area=None, day=None, hour=None) -> tuple:
+        """
+        (count, mean, std) arrays of a feature, optionally fixing area/day/hour, either in total
+        or per value of `by` ("area", "day" or "hour"). std is the population standard deviation;
+        mean and std are NaN where there are no readings.
+        """
+        count, total, sumsq = self._select(feature, area, day, hour)
+        free = [name for name, value in (("area", area), ("day", day), ("hour", hour)) if value is None]
+        if by is not None and by not in free:
+            raise ValueError(f"Cannot group by '{by}': expected one of {free}")
+        axes = tuple(i for i, name in enumerate(free) if name != by)
+        count, total, sumsq = count.sum(axis=axes), total.sum(axis=axes), sumsq.sum(axis=axes)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            std = np.sqrt(np.maximum(sumsq / count - mean ** 2, 0))
+        return count, mean, std
+
+    def stats(self, feature: str = 'flow_rate_lpm', by: str = None, area=None, day=None, hour=None) -> pd.DataFrame:
+        """summary() as a frame (count, mean, std, plus the `by` column), leaving out cells without readings."""
+        count, mean, std = self.summary(feature, by, area, day, hour)
+        result = pd.DataFrame({'count': np.atleast_1d(count), 'mean': np.atleast_1d(mean), 'std': np.atleast_1d(std)})
+        if by is not None:
+            result.insert(0, by, {"area": self.areas, "day": np.arange(7), "hour": np.arange(24)}[by])
+        return result[result['count'] > 0].reset_index(drop=True)
+
+    def hourly(self, feature: str = 'flow_rate_lpm', area=None, day=None) -> pd.DataFrame:
+        """Mean feature per hour of day, in the analyze_peak_usage shape (hour, <feature>)."""
+        stats = self.stats(feature, by="hour", area=area, day=day)
+        return stats[['hour', 'mean']].rename(columns={'mean': feature})
+
+    def peak_hour(self, feature: str = 'flow_rate_lpm', area=None, day=None) -> int:
+        """Hour of day with the highest mean feature value."""
+        _, mean, _ = self.summary(feature, by="hour", area=area, day=day)
+        return int(np.nanargmax(mean))